@@ -6,19 +6,41 @@ Uses the existing ComposerAPI from src.main
 
 import sys
 import os
-import json
+import asyncio
 import logging
+import logging.handlers
+import queue
+import atexit
+import re
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Union, Iterable
+from functools import lru_cache
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime, timezone
+from dataclasses import dataclass, asdict, replace
+import gzip
 import hashlib
+import hmac
 import secrets
+import time
+import threading
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, status
+import jwt
+import orjson
+from cachetools import TTLCache
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHash, VerificationError, VerifyMismatchError
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
 from pydantic import BaseModel, Field, EmailStr
 from contextlib import asynccontextmanager
 try:
@@ -27,20 +49,43 @@ try:
     FIREBASE_AVAILABLE = True
 except ImportError:
     FIREBASE_AVAILABLE = False
+    firebase_admin = credentials = firebase_auth = None
     logger = logging.getLogger(__name__)
     logger.warning("Firebase Admin SDK not available. Firebase authentication will be disabled.")
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
 
 # Add the current directory to Python path
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
+# Workflow output locations, anchored to this file like the writers in src/ (not the working directory)
+OUTPUTS_DIR = current_dir / "outputs"
+RUNS_DIR = OUTPUTS_DIR / "runs"
+IMAGES_DIR = OUTPUTS_DIR / "images"
+
 from src.main import ComposerAPI
 
-# Set up logging
+# Set up logging - records are handed to a queue and written by a listener thread,
+# so handlers never block the event loop on console/file I/O
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log_output_handler = logging.StreamHandler()
+log_output_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, log_output_handler)
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Authentication and User Models
@@ -77,82 +122,394 @@ class UserFormData(BaseModel):
 class UserFormUpdateRequest(BaseModel):
     form_data: UserFormData
 
-# Simple in-memory user database (replace with proper database in production)
-user_database: Dict[str, Dict[str, Any]] = {}
-user_forms: Dict[str, UserFormData] = {}
+# Epoch-second wall clock refreshed by a background task (see lifespan), so
+# hot paths like last_login updates don't read the system clock on every request.
+# Without the ticker (no lifespan, e.g. a bare TestClient) epoch_now reads the clock directly.
+_clock_epoch: int = int(time.time())
+_clock_ticking = False
+
+def epoch_now() -> int:
+    """Current time in epoch seconds, accurate to about one second"""
+    return _clock_epoch if _clock_ticking else int(time.time())
+
+async def _tick_clock() -> None:
+    """Refresh the cached clock once per second"""
+    global _clock_epoch, _clock_ticking
+    try:
+        while True:
+            _clock_epoch = int(time.time())
+            _clock_ticking = True
+            await asyncio.sleep(1)
+    finally:
+        _clock_ticking = False
+
+@dataclass(slots=True)
+class UserRecord:
+    """A stored user account - one compact record for both email and Firebase users"""
+    uid: str
+    email: Optional[str]
+    name: Optional[str]
+    provider: str  # "firebase" or "email"
+    created_at: int  # epoch seconds
+    last_login: int  # epoch seconds
+    password_hash: Optional[str] = None  # email users only
+    
+    def to_profile(self) -> Dict[str, Any]:
+        """Public profile for API responses (no password hash, datetimes instead of epochs)"""
+        return {
+            "uid": self.uid,
+            "email": self.email,
+            "name": self.name,
+            "provider": self.provider,
+            "created_at": datetime.fromtimestamp(self.created_at, timezone.utc),
+            "last_login": datetime.fromtimestamp(self.last_login, timezone.utc)
+        }
+
+@dataclass(slots=True)
+class FormRecord:
+    """A stored user form - UserFormData is only used to validate it at the API boundary"""
+    child_name: Optional[str] = None
+    child_age: Optional[int] = None
+    child_gender: Optional[str] = None
+    interests: Optional[List[str]] = None
+    reading_level: Optional[str] = None
+    location: Optional[str] = None
+    mother_tongue: Optional[str] = None
+    language_preference: Optional[str] = None
+
+# Values that count as "not filled in" for a form field
+EMPTY_FORM_VALUES = (None, "", [])
+
+# Shared stand-ins for users without a saved form - treat as read-only
+EMPTY_FORM = FormRecord()
+EMPTY_FORM_DATA: Dict[str, Any] = asdict(EMPTY_FORM)
+
+def form_data_dict(form_data: Optional[FormRecord]) -> Dict[str, Any]:
+    """Form fields as a dict, reusing the precomputed empty form when there is none"""
+    return asdict(form_data) if form_data is not None else EMPTY_FORM_DATA
+
+# User storage - Redis when REDIS_URL is configured (shared across workers),
+# otherwise these in-memory dicts (single process only, wiped on restart)
+user_database: Dict[str, UserRecord] = {}
+user_forms: Dict[str, FormRecord] = {}
+redis_client: Optional["aioredis.Redis"] = None
+
+async def load_user(user_id: str) -> Optional[UserRecord]:
+    """Load a user profile by uid"""
+    if redis_client is None:
+        return user_database.get(user_id)
+    raw = await redis_client.get(f"user:{user_id}")
+    return UserRecord(**orjson.loads(raw)) if raw else None
+
+async def store_user(user: UserRecord) -> None:
+    """Create or update a user profile"""
+    if redis_client is None:
+        user_database[user.uid] = user
+        return
+    await redis_client.set(f"user:{user.uid}", orjson.dumps(asdict(user)))
+
+async def load_user_form(user_id: str) -> Optional[FormRecord]:
+    """Load a user's saved form data"""
+    if redis_client is None:
+        return user_forms.get(user_id)
+    raw = await redis_client.get(f"form:{user_id}")
+    return FormRecord(**orjson.loads(raw)) if raw else None
+
+async def store_user_form(user_id: str, form_data: FormRecord) -> None:
+    """Save a user's form data"""
+    if redis_client is None:
+        user_forms[user_id] = form_data
+        return
+    await redis_client.set(f"form:{user_id}", orjson.dumps(asdict(form_data)))
 
 # Security
 security = HTTPBearer(auto_error=False)
 
+# Signed session tokens for email/password users
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY") or secrets.token_urlsafe(32)
+JWT_ALGORITHM = "HS256"
+JWT_EXPIRE_SECONDS = int(os.getenv("JWT_EXPIRE_SECONDS", "3600"))
+if not os.getenv("JWT_SECRET_KEY"):
+    logging.getLogger(__name__).warning("JWT_SECRET_KEY not set - using a random per-process secret, tokens will not survive restarts")
+
+# Argon2id hasher with the OWASP baseline parameters (19 MiB, 2 iterations, 1 lane) - a few
+# tens of ms per hash. Hashes made with other parameters are upgraded on the next login.
+# Hashing runs in worker threads (argon2 releases the GIL) so logins don't block the event loop.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19 * 1024, parallelism=1, hash_len=32)
+
 def hash_password(password: str) -> str:
-    """Hash a password using SHA-256 with salt"""
-    salt = secrets.token_hex(16)
-    return hashlib.sha256((password + salt).encode()).hexdigest() + ":" + salt
+    """Hash a password using Argon2id (the encoded hash embeds its own salt)"""
+    return password_hasher.hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash (Argon2id, or legacy SHA-256 "hash:salt")"""
+    if not hashed.startswith("$argon2"):
+        # Legacy SHA-256 + salt hashes created before the Argon2 migration
+        try:
+            hash_part, salt = hashed.split(":")
+            candidate = hashlib.sha256((password + salt).encode()).hexdigest()
+            # Constant-time comparison to avoid leaking timing information
+            return hmac.compare_digest(candidate, hash_part)
+        except (ValueError, TypeError, AttributeError):
+            return False
+    
     try:
-        hash_part, salt = hashed.split(":")
-        return hashlib.sha256((password + salt).encode()).hexdigest() == hash_part
-    except ValueError:
+        return password_hasher.verify(hashed, password)
+    except (VerifyMismatchError, VerificationError, InvalidHash):
+        return False
+
+def password_needs_rehash(hashed: str) -> bool:
+    """Check if a stored hash is legacy or uses outdated Argon2 parameters"""
+    if not hashed.startswith("$argon2"):
+        return True
+    try:
+        return password_hasher.check_needs_rehash(hashed)
+    except InvalidHash:
+        return True
+
+# Recently verified logins: user_id -> (stored hash, keyed HMAC of the password). A repeat
+# login with the same password inside the TTL skips Argon2. Only HMACs under a per-process
+# key are kept, never the password, and a changed stored hash invalidates the entry.
+verified_login_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+verified_login_lock = threading.Lock()  # verification runs in worker threads
+LOGIN_CACHE_KEY = secrets.token_bytes(32)
+
+def verify_password_cached(user_id: str, password: str, hashed: str) -> bool:
+    """verify_password() with a short-lived cache of successful verifications"""
+    digest = hmac.new(LOGIN_CACHE_KEY, password.encode(), hashlib.sha256).digest()
+    with verified_login_lock:
+        cached = verified_login_cache.get(user_id)
+    if cached is not None and cached[0] == hashed and hmac.compare_digest(cached[1], digest):
+        return True
+    if not verify_password(password, hashed):
         return False
+    with verified_login_lock:
+        verified_login_cache[user_id] = (hashed, digest)
+    return True
+
+# Verified Firebase ID tokens, keyed on the raw token string, to skip RSA verification on repeat requests
+firebase_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+LAST_LOGIN_DEBOUNCE_SECONDS = 60
+
+def verify_firebase_token_cached(id_token: str) -> Dict[str, Any]:
+    """Verify a Firebase ID token, reusing the decoded payload while it is cached and unexpired"""
+    decoded_token = firebase_token_cache.get(id_token)
+    if decoded_token is not None and decoded_token.get("exp", 0) > epoch_now():
+        return decoded_token
+    
+    decoded_token = firebase_auth.verify_id_token(id_token, check_revoked=False)
+    firebase_token_cache[id_token] = decoded_token
+    return decoded_token
+
+def touch_last_login(user: UserRecord) -> bool:
+    """Update last_login unless it was refreshed recently. Returns True if the user changed."""
+    now = epoch_now()
+    if now - user.last_login > LAST_LOGIN_DEBOUNCE_SECONDS:
+        user.last_login = now
+        return True
+    return False
+
+def new_firebase_user(decoded_token: Dict[str, Any]) -> UserRecord:
+    """Create a user record from a verified Firebase token"""
+    now = epoch_now()
+    return UserRecord(
+        uid=decoded_token['uid'],
+        email=decoded_token.get('email'),
+        name=decoded_token.get('name'),
+        provider="firebase",
+        created_at=now,
+        last_login=now
+    )
+
+# Tokens are issued per one-minute window (iat = window start), so the same user logging in
+# repeatedly within a window gets the identical token back from the cache without re-signing
+JWT_ISSUE_WINDOW_SECONDS = 60
+
+@lru_cache(maxsize=10_000)
+def _sign_token(uid: str, email: Optional[str], name: Optional[str], issued_at: int) -> str:
+    """Sign the JWT for one user and issue window"""
+    payload = {
+        "sub": uid,
+        "email": email,
+        "name": name,
+        "provider": "email",
+        "iat": issued_at,
+        "exp": issued_at + JWT_EXPIRE_SECONDS
+    }
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
-def generate_simple_token(user_id: str) -> str:
-    """Generate a simple token for email/password users"""
-    timestamp = str(int(datetime.now().timestamp()))
-    token_data = f"{user_id}:{timestamp}"
-    return secrets.token_urlsafe(32) + ":" + token_data
+def generate_simple_token(user: UserRecord) -> str:
+    """Generate a signed JWT for email/password users"""
+    now = epoch_now()
+    return _sign_token(user.uid, user.email, user.name, now - now % JWT_ISSUE_WINDOW_SECONDS)
 
-async def get_current_user(token: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Optional[Dict[str, Any]]:
+def decode_simple_token(token: str) -> Optional[Dict[str, Any]]:
+    """Decode and verify a JWT issued by generate_simple_token"""
+    try:
+        claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+    return claims if claims.get("provider") == "email" else None
+
+async def get_current_user(token: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Optional[UserRecord]:
     """Get current user from token"""
     if not token:
         return None
     
     try:
-        # Try Firebase token first if available
+        # Try our own signed token first - a local HMAC check, much cheaper than Firebase verification.
+        # The claims carry everything most handlers need, so the user store is not touched here;
+        # handlers that need stored-only fields (e.g. created_at) load the profile themselves.
+        claims = decode_simple_token(token.credentials)
+        if claims:
+            return UserRecord(
+                uid=claims["sub"],
+                email=claims.get("email"),
+                name=claims.get("name"),
+                provider="email",
+                created_at=claims["iat"],
+                last_login=claims["iat"]
+            )
+        
+        # Fall back to Firebase token if available
         if FIREBASE_AVAILABLE:
             try:
-                from firebase_admin import auth as firebase_auth
-                decoded_token = firebase_auth.verify_id_token(token.credentials)
+                decoded_token = verify_firebase_token_cached(token.credentials)
                 user_id = decoded_token['uid']
                 
                 # Get or create user profile
-                if user_id not in user_database:
-                    user_database[user_id] = {
-                        "uid": user_id,
-                        "email": decoded_token.get('email'),
-                        "name": decoded_token.get('name'),
-                        "provider": "firebase",
-                        "created_at": datetime.now(timezone.utc),
-                        "last_login": datetime.now(timezone.utc)
-                    }
-                else:
-                    user_database[user_id]["last_login"] = datetime.now(timezone.utc)
+                user = await load_user(user_id)
+                if user is None:
+                    user = new_firebase_user(decoded_token)
+                    await store_user(user)
+                elif touch_last_login(user):
+                    await store_user(user)
                 
-                return user_database[user_id]
+                return user
             except Exception as e:
-                logger.debug(f"Firebase token verification failed: {e}")
-        
-        # Try simple token for email/password users
-        if ":" in token.credentials:
-            try:
-                token_part, data_part = token.credentials.split(":", 1)
-                user_id, timestamp = data_part.split(":")
-                
-                # Simple validation (in production, use proper JWT)
-                if user_id in user_database and user_database[user_id]["provider"] == "email":
-                    user_database[user_id]["last_login"] = datetime.now(timezone.utc)
-                    return user_database[user_id]
-            except ValueError:
-                pass
+                logger.debug("Firebase token verification failed: %s", e)
         
         return None
     except Exception as e:
-        logger.error(f"Error verifying token: {e}")
+        logger.error("Error verifying token: %s", e)
+        return None
+
+# Global cache for the latest generated story, kept as pre-serialized JSON bytes
+# plus zstd/gzip copies compressed once for clients that accept them
+latest_story_cache: Optional[bytes] = None
+latest_story_cache_encoded: Dict[str, bytes] = {}
+
+# Precompressed encodings we can serve as (encoding, header aliases, matched by "*"), in
+# preference order when a client rates them equally. zstd is smaller and faster to decode but
+# only recent browsers support it, so it is only sent when listed explicitly; gzip covers the rest.
+GZIP_ENCODING = ("gzip", ("gzip", "x-gzip"), True)
+SERVED_ENCODINGS = (("zstd", ("zstd",), False), GZIP_ENCODING) if ZSTD_AVAILABLE else (GZIP_ENCODING,)
+
+@lru_cache(maxsize=64)
+def preferred_encoding(accept_encoding: str) -> Optional[str]:
+    """Best served encoding an Accept-Encoding header allows, honouring q-values ("gzip;q=0" refuses it)"""
+    q_values: Dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        q_values[name.strip().lower()] = q
+    
+    # An unlisted coding falls back to the "*" rating where allowed (refused when there is no "*")
+    wildcard_q = q_values.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding, aliases, by_wildcard in SERVED_ENCODINGS:
+        q = next((q_values[alias] for alias in aliases if alias in q_values), wildcard_q if by_wildcard else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def cache_latest_story(story_response: BaseModel) -> bytes:
+    """Serialize a story response once and store it (and its compressed copies) as the latest story"""
+    global latest_story_cache, latest_story_cache_encoded
+    latest_story_cache = story_response.model_dump_json().encode("utf-8")
+    encoded = {"gzip": gzip.compress(latest_story_cache, compresslevel=6)}
+    if ZSTD_AVAILABLE:
+        encoded["zstd"] = zstandard.ZstdCompressor(level=3).compress(latest_story_cache)
+    latest_story_cache_encoded = encoded
+    return latest_story_cache
+
+# Global composer API instance
+composer_api: Optional[ComposerAPI] = None
+
+async def connect_redis() -> Optional["aioredis.Redis"]:
+    """Connect to Redis for shared user storage if REDIS_URL is configured."""
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return None
+    if not REDIS_AVAILABLE:
+        logger.warning("⚠️ REDIS_URL is set but the redis package is not installed")
+        return None
+    try:
+        client = aioredis.from_url(redis_url)
+        await client.ping()
+        logger.info("✅ Connected to Redis for user storage")
+        return client
+    except Exception as e:
+        logger.warning("⚠️ Redis connection failed: %s", e)
+        logger.info("User storage will fall back to in-memory dictionaries")
         return None
 
-# Global cache for the latest generated story
-latest_story_cache: Optional[Dict[str, Any]] = None
+def init_firebase() -> None:
+    """Initialize the Firebase Admin SDK if available."""
+    if not FIREBASE_AVAILABLE:
+        return
+    try:
+        # Check if Firebase app is already initialized
+        try:
+            firebase_admin.get_app()
+            logger.info("✅ Firebase Admin SDK already initialized")
+        except ValueError:
+            # Initialize with default credentials or service account
+            # In production, set GOOGLE_APPLICATION_CREDENTIALS environment variable
+            # or provide path to service account key file
+            firebase_admin.initialize_app()
+            logger.info("✅ Firebase Admin SDK initialized")
+    except Exception as e:
+        logger.warning("⚠️ Firebase Admin SDK initialization failed: %s", e)
+        logger.info("Firebase authentication will fall back to token verification only")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the application on startup and release connections on shutdown."""
+    global composer_api, redis_client
+    try:
+        # Independent init steps run concurrently
+        composer_api, redis_client, _ = await asyncio.gather(
+            asyncio.to_thread(ComposerAPI),
+            connect_redis(),
+            asyncio.to_thread(init_firebase)
+        )
+        app.state.composer = composer_api
+        logger.info("✅ Composer API started successfully")
+    except Exception as e:
+        logger.error("❌ Failed to initialize Composer API: %s", e)
+        raise
+    
+    # Response cache for read-heavy endpoints, shared through Redis when available
+    if redis_client is not None:
+        FastAPICache.init(RedisBackend(redis_client), prefix="composer")
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix="composer")
+    
+    clock_task = asyncio.create_task(_tick_clock())
+    
+    yield
+    
+    clock_task.cancel()
+    if redis_client is not None:
+        await redis_client.aclose()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -160,23 +517,21 @@ app = FastAPI(
     description="AI-powered story generation system using LangGraph Composer",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
+# Default allows the local dev frontends: React (3000), Vite (5173/5174) and the
+# alternative port 8080 on localhost/127.0.0.1. Set CORS_ORIGIN_REGEX for production.
+CORS_ORIGIN_REGEX = os.getenv(
+    "CORS_ORIGIN_REGEX",
+    r"^http://(localhost|127\.0\.0\.1):(3000|5173|5174|8080)$"
+)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # React dev server
-        "http://localhost:5173",  # Vite dev server
-        "http://localhost:5174",  # Alternative Vite port
-        "http://localhost:8080",  # Alternative port
-        "http://127.0.0.1:3000",
-        "http://127.0.0.1:5173", 
-        "http://127.0.0.1:5174",
-        "http://127.0.0.1:8080",
-        "*"  # Allow all origins for development - configure appropriately for production
-    ],
+    allow_origin_regex=CORS_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
@@ -186,43 +541,22 @@ app.add_middleware(
 simple_ui_path = Path(__file__).parent.parent / "simple_ui" / "dist"
 if simple_ui_path.exists():
     app.mount("/static", StaticFiles(directory=str(simple_ui_path)), name="static")
-    logger.info(f"✅ Mounted simple_ui static files from {simple_ui_path}")
+    logger.info("✅ Mounted simple_ui static files from %s", simple_ui_path)
 else:
-    logger.warning(f"⚠️ Simple UI dist directory not found at {simple_ui_path}")
+    logger.warning("⚠️ Simple UI dist directory not found at %s", simple_ui_path)
 
-# Global composer API instance
-composer_api: Optional[ComposerAPI] = None
+# Resolved once at import, like the static mount above
+simple_ui_index: Optional[Path] = simple_ui_path / "index.html"
+if not simple_ui_index.exists():
+    simple_ui_index = None
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the application on startup."""
-    global composer_api
-    try:
-        composer_api = ComposerAPI()
-        logger.info("✅ Composer API started successfully")
-        
-        # Initialize Firebase Admin SDK if available
-        if FIREBASE_AVAILABLE:
-            try:
-                import firebase_admin
-                from firebase_admin import credentials
-                
-                # Check if Firebase app is already initialized
-                try:
-                    firebase_admin.get_app()
-                    logger.info("✅ Firebase Admin SDK already initialized")
-                except ValueError:
-                    # Initialize with default credentials or service account
-                    # In production, set GOOGLE_APPLICATION_CREDENTIALS environment variable
-                    # or provide path to service account key file
-                    firebase_admin.initialize_app()
-                    logger.info("✅ Firebase Admin SDK initialized")
-            except Exception as e:
-                logger.warning(f"⚠️ Firebase Admin SDK initialization failed: {e}")
-                logger.info("Firebase authentication will fall back to token verification only")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Composer API: {e}")
-        raise
+API_INFO = {
+    "message": "Composer Story Generation API",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "redoc": "/redoc"
+}
+ROOT_FALLBACK_INFO = {**API_INFO, "frontend": "Simple UI not found - serve manually or build the frontend"}
 
 def get_composer_api() -> ComposerAPI:
     """Get the composer API instance with error handling."""
@@ -230,6 +564,15 @@ def get_composer_api() -> ComposerAPI:
         raise HTTPException(status_code=500, detail="API not properly initialized")
     return composer_api
 
+# Cap concurrent generations so we stay within the LLM provider's rate limits
+MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "4"))
+generation_semaphore = asyncio.Semaphore(MAX_CONCURRENT_GENERATIONS)
+
+async def run_generation(func, *args, **kwargs) -> Any:
+    """Run a blocking workflow call in a worker thread so the event loop keeps serving requests."""
+    async with generation_semaphore:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
 # Pydantic models for API requests/responses
 class StoryGenerationRequest(BaseModel):
     user_input: str = Field(..., description="The story request or prompt")
@@ -272,6 +615,26 @@ class ComprehensiveStoryRequest(BaseModel):
     # Use case selection
     use_case: Optional[str] = Field(default="story_generator", description="Use case to execute")
 
+@dataclass(slots=True)
+class Personalization:
+    """Resolved personalization for one story - request fields merged with the user's saved form"""
+    child_name: Optional[str]
+    child_age: int
+    child_gender: Optional[str]
+    interests: List[str]
+    reading_level: str
+    companions: List[Dict[str, Any]]
+    location: Optional[str]
+    region: Optional[str]
+    mother_tongue: Optional[str]
+    language_of_story: str
+    theme: str
+    moral_lesson: Optional[str]
+    story_length: str
+    target_audience: str
+    include_images: bool
+    image_style: Optional[str]
+
 # Legacy frontend-compatible model for backward compatibility
 class FrontendStoryRequest(BaseModel):
     theme: str = Field(..., description="Story theme (fantasy, adventure, etc.)")
@@ -283,6 +646,8 @@ class FrontendStoryRequest(BaseModel):
     image_style: Optional[str] = Field(None, description="Image generation style")
     use_case: Optional[str] = Field(default="story_generator", description="Use case to execute")
 
+# Response models below are built from trusted, server-side data, so handlers
+# create them with model_construct() to skip pydantic validation on the hot path.
 class StoryChapter(BaseModel):
     id: str
     title: str
@@ -310,32 +675,137 @@ class WorkflowResponse(BaseModel):
     result: Dict[str, Any]
     execution_time: Optional[float] = None
 
+# Run directory names start with a sortable timestamp, so the newest run is the max name.
+# Resolution is cached and only redone when outputs/runs or its newest run directory changes.
+_latest_run_cache: Dict[str, Any] = {"key": None, "newest": None, "complete": None}
+_latest_run_lock = asyncio.Lock()
+RUN_CONTENT_FILES = frozenset(("formatted_story.json", "content.txt"))
+
+def _mtime_ns(path: Union[str, Path]) -> Optional[int]:
+    """mtime of a path in nanoseconds, or None if it does not exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def _scan_runs(runs_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return (newest run name, newest run name with formatted_story.json or content.txt)"""
+    with os.scandir(runs_path) as entries:
+        run_names = [entry.name for entry in entries if entry.is_dir()]
+    if not run_names:
+        return None, None
+    
+    def is_complete(name: str) -> bool:
+        # One directory listing per candidate instead of an exists() call per file
+        try:
+            return not RUN_CONTENT_FILES.isdisjoint(os.listdir(os.path.join(runs_path, name)))
+        except FileNotFoundError:
+            return False
+    
+    # Plain string max; the newest run is nearly always the complete one, so only sort when it isn't
+    newest = max(run_names)
+    if is_complete(newest):
+        return newest, newest
+    run_names.sort(reverse=True)
+    return newest, next((name for name in run_names[1:] if is_complete(name)), None)
+
+async def resolve_latest_runs(runs_path: Path) -> Tuple[Optional[str], Optional[str]]:
+    """Cached (newest run name, newest complete run name) for a runs directory"""
+    async with _latest_run_lock:
+        runs_mtime = _mtime_ns(runs_path)
+        if runs_mtime is None:
+            return None, None
+        
+        cache = _latest_run_cache
+        # The newest run's own mtime catches content files written after its directory was created
+        if cache["key"] is not None and cache["key"][:2] == (str(runs_path), runs_mtime):
+            newest_mtime = _mtime_ns(runs_path / cache["newest"]) if cache["newest"] else None
+            if cache["key"][2] == newest_mtime:
+                return cache["newest"], cache["complete"]
+        
+        newest, complete = await asyncio.to_thread(_scan_runs, str(runs_path))
+        newest_mtime = _mtime_ns(runs_path / newest) if newest else None
+        cache.update(key=(str(runs_path), runs_mtime, newest_mtime), newest=newest, complete=complete)
+        return newest, complete
+
+# Plain-text content file names in a run directory, in order of preference
+# (content.txt is the unified naming, the others are kept for backward compatibility)
+CONTENT_FILE_CANDIDATES = ("content.txt", "formatted_story.txt", "poetry_content.txt")
+
+def find_content_file(run_files: set) -> Optional[str]:
+    """First content file name present in a run directory listing"""
+    for name in CONTENT_FILE_CANDIDATES:
+        if name in run_files:
+            return name
+    return None
+
+def read_run_content(run_dir: Path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Read a run's story content (blocking).
+    
+    Returns the parsed formatted_story.json (if present) and, when that has no
+    chapters or sections, the text of the run's content file (if present).
+    """
+    # List the run once and probe the listing instead of stat()ing each candidate file
+    run_files = set(os.listdir(run_dir))
+    
+    formatted_data = None
+    if "formatted_story.json" in run_files:
+        formatted_data = load_json_file(run_dir / "formatted_story.json")
+        if formatted_data.get('chapters') or formatted_data.get('sections'):
+            return formatted_data, None
+    
+    # Look for the content file (unified naming for both story and poetry)
+    content_file_name = find_content_file(run_files)
+    if content_file_name is None:
+        return formatted_data, None
+    return formatted_data, read_text_file(run_dir / content_file_name)
+
+def read_text_file(path: Union[str, Path]) -> str:
+    """Read a UTF-8 text file (blocking - run via asyncio.to_thread from handlers)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def load_json_file(path: Union[str, Path]) -> Any:
+    """Read and parse a JSON file with orjson (blocking - run via asyncio.to_thread from handlers)"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands the open file to the server when it supports the
+    ASGI "http.response.zerocopysend" extension, so bytes go kernel -> socket
+    without passing through Python buffers. Falls back to regular chunked
+    FileResponse streaming otherwise.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        if scope.get("method") == "HEAD" or "http.response.zerocopysend" not in scope.get("extensions", {}):
+            await super().__call__(scope, receive, send)
+            return
+        
+        with open(self.path, "rb") as file:
+            if self.stat_result is None:
+                self.set_stat_headers(os.fstat(file.fileno()))
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.zerocopysend", "file": file, "more_body": False})
+        
+        if self.background is not None:
+            await self.background()
+
 # API Routes
 @app.get("/")
 async def root():
     """Serve the simple_ui frontend or API information."""
-    simple_ui_index = Path(__file__).parent.parent / "simple_ui" / "dist" / "index.html"
-    if simple_ui_index.exists():
+    if simple_ui_index:
         return FileResponse(simple_ui_index)
-    else:
-        # Fallback to API information
-        return {
-            "message": "Composer Story Generation API",
-            "version": "1.0.0",
-            "docs": "/docs",
-            "redoc": "/redoc",
-            "frontend": "Simple UI not found - serve manually or build the frontend"
-        }
+    # Fallback to API information
+    return ROOT_FALLBACK_INFO
 
 @app.get("/api")
 async def api_root():
     """API root endpoint with information."""
-    return {
-        "message": "Composer Story Generation API",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "redoc": "/redoc"
-    }
+    return API_INFO
 
 @app.get("/health")
 async def health_check():
@@ -343,6 +813,7 @@ async def health_check():
     return {"status": "healthy", "timestamp": "2025-07-14"}
 
 @app.get("/use-cases")
+@cache(expire=3600)
 async def list_use_cases():
     """List all available use cases."""
     try:
@@ -362,7 +833,8 @@ async def generate_story(request: StoryGenerationRequest):
         theme = request.educational_themes[0] if request.educational_themes else "adventure"
         
         # Run the workflow with correct parameter names
-        result = api.run_workflow(
+        result = await run_generation(
+            api.run_workflow,
             use_case=request.use_case,
             user_input=request.user_input,
             target_audience=request.target_age_group,
@@ -380,6 +852,7 @@ async def generate_story(request: StoryGenerationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/workflow-info/{use_case}")
+@cache(expire=3600)  # the default key builder includes use_case, so entries are per use case
 async def get_workflow_info(use_case: str):
     """Get information about a specific workflow."""
     try:
@@ -398,7 +871,8 @@ async def quick_story_generation(request: StoryGenerationRequest):
         from src.main import run_story_generation
         
         # Use the convenience function with correct parameter mapping
-        result = run_story_generation(
+        result = await run_generation(
+            run_story_generation,
             user_input=request.user_input,
             target_audience=request.target_age_group,
             theme=request.educational_themes[0] if request.educational_themes else "adventure"
@@ -412,10 +886,146 @@ async def quick_story_generation(request: StoryGenerationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def list_png_files(image_dir: Union[str, Path]) -> List[str]:
+    """PNG file names in a directory, using the dirent type instead of a stat() per file"""
+    with os.scandir(image_dir) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(".png") and entry.is_file(follow_symlinks=False)]
+
+# Image directories are named images_YYYYMMDD_HHMMSS_<suffix>; a run uses images created up to
+# 30 minutes (3000 in HHMMSS arithmetic) before it, else the latest directory of that day.
+IMAGE_MATCH_WINDOW = 3000
+
+@lru_cache(maxsize=32)
+def _image_dirs_for_date(images_base: str, date_part: str, mtime_ns: int) -> Tuple[Tuple[int, ...], Tuple[str, ...]]:
+    """Sorted (times, names) of the image directories for a date. Cached per directory mtime."""
+    prefix = f"images_{date_part}_"
+    found = []
+    with os.scandir(images_base) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.is_dir():
+                parts = entry.name.split('_')
+                time_str = parts[2] if len(parts) >= 3 else "000000"
+                if time_str.isdigit():
+                    found.append((int(time_str), entry.name))
+    found.sort()
+    return tuple(t for t, _ in found), tuple(name for _, name in found)
+
+def find_image_dir_for_run(images_base: Path, date_part: str, time_part: str) -> Optional[str]:
+    """Name of the image directory closest to (but not later than) a run's timestamp"""
+    try:
+        times, names = _image_dirs_for_date(str(images_base), date_part, images_base.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if not names:
+        return None
+    
+    target_time = int(time_part)
+    idx = bisect_right(times, target_time) - 1
+    if idx >= 0 and target_time - times[idx] <= IMAGE_MATCH_WINDOW:
+        return names[idx]
+    # If no match within 30 minutes, use the latest available directory
+    return names[-1]
+
+# Use full localhost base URL to ensure images load correctly
+IMAGE_URL_BASE = "http://localhost:8000/api/images/"
+
+def build_image_urls(image_dir: str, image_names: Iterable[str]) -> List[str]:
+    """Public URLs for the images of one image directory"""
+    prefix = f"{IMAGE_URL_BASE}{image_dir}/"
+    return [prefix + name for name in image_names]
+
+def find_run_images(images_base: Path, date_part: str, time_part: Optional[str]) -> Tuple[Optional[str], List[str]]:
+    """Image directory matching a run's timestamp and its PNG names (blocking)"""
+    if not (time_part and time_part.isdigit()):
+        return None, []
+    # Find the closest matching images directory by timestamp
+    best_match = find_image_dir_for_run(images_base, date_part, time_part)
+    if best_match is None:
+        return None, []
+    return best_match, list_png_files(images_base / best_match)
+
+def build_run_image_urls(image_paths: Iterable[str]) -> List[str]:
+    """Public URLs for the images a workflow run generated (its state["image_urls"] file paths)"""
+    return [f"{IMAGE_URL_BASE}{path.parent.name}/{path.name}" for path in map(Path, image_paths)]
+
+def _content_from_formatted_story(formatted_story: Any) -> str:
+    """Join chapter/section contents of a structured formatted_story"""
+    if not isinstance(formatted_story, dict):
+        return ""
+    for key in ("chapters", "sections"):
+        if key in formatted_story:
+            return "\n\n".join(
+                part["content"] for part in formatted_story[key]
+                if isinstance(part, dict) and "content" in part
+            )
+    return formatted_story.get("content", "")
+
+def _content_from_output(output: Any) -> str:
+    """Get story text from an output dict or a plain output string"""
+    if isinstance(output, dict):
+        return output.get("story", "")
+    return output if isinstance(output, str) else ""
+
+# Rule line between a chapter heading and its body in plain-text story content
+CHAPTER_SEPARATOR = "=" * 50 + "\n"
+
+def split_paragraphs(content: str) -> List[str]:
+    """Split text on double newlines into non-empty, stripped paragraphs (each stripped once)"""
+    return [stripped for p in content.split('\n\n') if (stripped := p.strip())]
+
+# Result keys probed for content, in priority order: (key, extractor, content type)
+CONTENT_PROBES = (
+    ("formatted_story", _content_from_formatted_story, "story"),
+    ("output", _content_from_output, "story"),
+    ("poetry_content", str, "poetry"),
+    ("music_content", str, "music"),
+    ("story", str, "story"),
+    ("content", str, "story"),
+    ("text", str, "story"),
+    ("result", str, "story"),
+)
+
+def extract_result_content(result: Dict[str, Any]) -> Tuple[str, str, Optional[str]]:
+    """Find the generated content in a workflow result. Returns (content, content_type, key)."""
+    for key, extract, content_type in CONTENT_PROBES:
+        value = result.get(key)
+        if value:
+            content = extract(value)
+            if content:
+                return content, content_type, key
+    return "", "story", None
+
+# Reading time in minutes by story length, scaled by reading level for personalized stories
+STORY_LENGTH_MINUTES = {"short": 3, "medium": 5, "long": 8}
+READING_LEVEL_FACTORS = {"simple": 0.8, "medium": 1.0, "advanced": 1.3}
+READING_TIMES = {
+    (length, level): int(minutes * factor)
+    for length, minutes in STORY_LENGTH_MINUTES.items()
+    for level, factor in READING_LEVEL_FACTORS.items()
+}
+
+def reading_time_for(story_length: str, reading_level: str) -> int:
+    """Estimated reading time in minutes for a story length and reading level"""
+    reading_time = READING_TIMES.get((story_length, reading_level))
+    if reading_time is None:
+        reading_time = int(STORY_LENGTH_MINUTES.get(story_length, 5) * READING_LEVEL_FACTORS.get(reading_level, 1.0))
+    return reading_time
+
+# Saved form field -> (workflow kwarg, converter) applied when the field is filled in
+FORM_TO_WORKFLOW_FIELDS = (
+    ("child_age", "child_age", str),
+    ("reading_level", "reading_level", str),
+    ("interests", "interests", ", ".join),  # the workflow expects a comma-separated string
+    ("child_gender", "child_gender", str),
+    ("location", "location", str),
+    ("mother_tongue", "mother_tongue", str),
+    ("language_preference", "language_of_story", str),
+)
+
 @app.post("/generate-story", response_model=FrontendStoryResponse)
 async def generate_story_frontend(
     request: FrontendStoryRequest,
-    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+    current_user: Optional[UserRecord] = Depends(get_current_user)
 ):
     """Generate a story using the frontend-compatible format. Uses saved user form data if available."""
     try:
@@ -435,130 +1045,67 @@ async def generate_story_frontend(
             "story_length": request.story_length
         }
         
+        # Load the user's saved form once and reuse it for the whole request
+        saved_form = await load_user_form(current_user.uid) if current_user else None
+        
         # Enhance with user form data if available
         if current_user:
-            user_id = current_user["uid"]
-            saved_form = user_forms.get(user_id, UserFormData())
+            user_id = current_user.uid
             
             # Add personalization from saved form data
-            if saved_form.child_name and not request.character_name:
+            if saved_form and saved_form.child_name and not request.character_name:
                 user_input = user_input.replace("character named", f"character named {saved_form.child_name}")
                 workflow_kwargs["child_name"] = saved_form.child_name
             elif request.character_name:
                 workflow_kwargs["child_name"] = request.character_name
             
-            if saved_form.child_age:
-                workflow_kwargs["child_age"] = str(saved_form.child_age)
-                workflow_kwargs["target_audience"] = f"age {saved_form.child_age}"
-            
-            if saved_form.reading_level:
-                workflow_kwargs["reading_level"] = saved_form.reading_level
-            
-            if saved_form.interests:
-                # Convert list to comma-separated string for the workflow
-                workflow_kwargs["interests"] = ", ".join(saved_form.interests) if saved_form.interests else ""
-            
-            if saved_form.child_gender:
-                workflow_kwargs["child_gender"] = saved_form.child_gender
-            
-            if saved_form.location:
-                workflow_kwargs["location"] = saved_form.location
-            
-            if saved_form.mother_tongue:
-                workflow_kwargs["mother_tongue"] = saved_form.mother_tongue
-            
-            if saved_form.language_preference:
-                workflow_kwargs["language_of_story"] = saved_form.language_preference
+            if saved_form:
+                for form_field, workflow_key, convert in FORM_TO_WORKFLOW_FIELDS:
+                    value = getattr(saved_form, form_field)
+                    if value:
+                        workflow_kwargs[workflow_key] = convert(value)
+                
+                if saved_form.child_age:
+                    workflow_kwargs["target_audience"] = f"age {saved_form.child_age}"
             
-            logger.info(f"📝 Enhanced story generation with user {user_id} form data")
+            logger.info("📝 Enhanced story generation with user %s form data", user_id)
         
         # Add image style if provided
         if request.include_images and request.image_style:
             workflow_kwargs["image_style"] = request.image_style
         
         # Map story length to reading time
-        length_map = {"short": 3, "medium": 5, "long": 8}
-        reading_time = length_map.get(request.story_length, 5)
+        reading_time = STORY_LENGTH_MINUTES.get(request.story_length, 5)
         
         # Run the workflow
-        result = api.run_workflow(
+        result = await run_generation(
+            api.run_workflow,
             use_case=request.use_case or "story_generator",  # Use provided use case or default
             user_input=user_input,
             **workflow_kwargs
         )
         
         # Debug: Log the actual result structure
-        logger.info(f"📊 Full workflow result: {result}")
-        logger.info(f"📊 Result type: {type(result)}")
-        logger.info(f"📊 Result keys: {result.keys() if isinstance(result, dict) else 'Not a dict'}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Full workflow result: %r", result)
+            logger.debug("📊 Result type: %s", type(result))
+            logger.debug("📊 Result keys: %s", result.keys() if isinstance(result, dict) else 'Not a dict')
         
         # Extract content from result with better parsing (handles both story and poetry)
         content = ""
         content_type = "story"
         formatted_story_structure = None
         
-        # Try different possible result structures
         if isinstance(result, dict):
-            # FIRST: Check for formatted_story structure (this has proper chapters)
-            if "formatted_story" in result and result["formatted_story"]:
-                formatted_story_structure = result["formatted_story"]
-                logger.info(f"📚 Found structured formatted_story with chapters")
-                content_type = "story"
-                
-                # Extract content from chapters or sections for fallback display
-                if isinstance(formatted_story_structure, dict):
-                    content_parts = []
-                    if "chapters" in formatted_story_structure:
-                        for chapter in formatted_story_structure["chapters"]:
-                            if isinstance(chapter, dict) and "content" in chapter:
-                                content_parts.append(chapter["content"])
-                    elif "sections" in formatted_story_structure:
-                        for section in formatted_story_structure["sections"]:
-                            if isinstance(section, dict) and "content" in section:
-                                content_parts.append(section["content"])
-                    elif "content" in formatted_story_structure:
-                        content_parts.append(formatted_story_structure["content"])
-                    
-                    if content_parts:
-                        content = "\n\n".join(content_parts)
-                        logger.info(f"📖 Extracted content from formatted structure: {len(content)} chars")
-            
-            # If no formatted_story, try standard output.story format
-            if not content and "output" in result and isinstance(result["output"], dict):
-                content = result["output"].get("story", "")
-                if content:
-                    logger.info(f"📖 Found story in output.story: {len(content)} chars")
-                    content_type = "story"
-            
-            # If not found, try direct output as string
-            if not content and "output" in result:
-                output = result["output"]
-                if isinstance(output, str):
-                    content = output
-                    logger.info(f"📖 Found content as direct output string: {len(content)} chars")
-            
-            # Try poetry and music content (for poetry_and_song use case)
-            if not content:
-                if "poetry_content" in result and result["poetry_content"]:
-                    content = str(result["poetry_content"])
-                    content_type = "poetry"
-                    logger.info(f"🎭 Found poetry content: {len(content)} chars")
-                elif "music_content" in result and result["music_content"]:
-                    content = str(result["music_content"])
-                    content_type = "music"
-                    logger.info(f"🎵 Found music content: {len(content)} chars")
-            
-            # Try other possible keys
-            if not content:
-                for key in ["story", "content", "text", "result"]:
-                    if key in result and result[key]:
-                        content = str(result[key])
-                        logger.info(f"📖 Found content in key '{key}': {len(content)} chars")
-                        break
+            # Structured chapters are reused below even if content came from another key
+            formatted_story_structure = result.get("formatted_story") or None
+            content, content_type, content_key = extract_result_content(result)
+            if content:
+                logger.info("📖 Found %s content in '%s': %d chars", content_type, content_key, len(content))
         
         # Final fallback with error logging
         if not content:
-            logger.error(f"❌ No content found in result: {result}")
+            logger.error("❌ No content found in result: %r", result)
             content = f"Sorry, there was an issue generating your {request.use_case or 'content'}. Please try again."
         
         # Create chapters based on content type and structure
@@ -566,14 +1113,14 @@ async def generate_story_frontend(
         
         if content_type == "poetry":
             # For poetry, treat as single "chapter" but format appropriately
-            chapters = [StoryChapter(
+            chapters = [StoryChapter.model_construct(
                 id="1",
                 title="Poetry",
                 content=content
             )]
         elif content_type == "music":
             # For music, treat as single "chapter" but format appropriately
-            chapters = [StoryChapter(
+            chapters = [StoryChapter.model_construct(
                 id="1", 
                 title="Song",
                 content=content
@@ -585,25 +1132,25 @@ async def generate_story_frontend(
                     # Use the properly structured chapters from formatted_story
                     for i, chapter_data in enumerate(formatted_story_structure["chapters"]):
                         if isinstance(chapter_data, dict):
-                            chapters.append(StoryChapter(
+                            chapters.append(StoryChapter.model_construct(
                                 id=str(i + 1),
                                 title=chapter_data.get("title", f"Chapter {i + 1}"),
                                 content=chapter_data.get("content", "")
                             ))
-                    logger.info(f"📚 Created {len(chapters)} chapters from structured data")
+                    logger.info("📚 Created %d chapters from structured data", len(chapters))
                 elif "sections" in formatted_story_structure:
                     # Use the properly structured sections from formatted_story
                     for i, section_data in enumerate(formatted_story_structure["sections"]):
                         if isinstance(section_data, dict):
-                            chapters.append(StoryChapter(
+                            chapters.append(StoryChapter.model_construct(
                                 id=str(i + 1),
                                 title=section_data.get("title", f"Section {i + 1}"),
                                 content=section_data.get("content", "")
                             ))
-                    logger.info(f"📚 Created {len(chapters)} sections from structured data")
+                    logger.info("📚 Created %d sections from structured data", len(chapters))
                 elif "content" in formatted_story_structure:
                     # Single content block
-                    chapters = [StoryChapter(
+                    chapters = [StoryChapter.model_construct(
                         id="1",
                         title=formatted_story_structure.get("title", f"The {request.theme.title()} Adventure"),
                         content=formatted_story_structure["content"]
@@ -611,19 +1158,18 @@ async def generate_story_frontend(
             
             # Fallback: parse content by paragraphs if no structured data
             if not chapters and content:
-                paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+                paragraphs = split_paragraphs(content)
                 if len(paragraphs) <= 3:
                     # Short story - single chapter
                     character_name = request.character_name
-                    if current_user and not character_name:
-                        saved_form = user_forms.get(current_user["uid"], UserFormData())
+                    if saved_form and not character_name:
                         character_name = saved_form.child_name
                     
                     title = f"The {request.theme.title()} Adventure"
                     if character_name:
                         title = f"{character_name}'s {request.theme.title()} Adventure"
                     
-                    chapters = [StoryChapter(
+                    chapters = [StoryChapter.model_construct(
                         id="1",
                         title=title,
                         content=content
@@ -633,16 +1179,16 @@ async def generate_story_frontend(
                     chapter_size = max(1, len(paragraphs) // 3)
                     for i in range(0, len(paragraphs), chapter_size):
                         chapter_paragraphs = paragraphs[i:i + chapter_size]
-                        chapters.append(StoryChapter(
+                        chapters.append(StoryChapter.model_construct(
                             id=str(len(chapters) + 1),
                             title=f"Chapter {len(chapters) + 1}",
                             content='\n\n'.join(chapter_paragraphs)
                         ))
-                logger.info(f"📖 Created {len(chapters)} chapters from paragraph parsing")
+                logger.info("📖 Created %d chapters from paragraph parsing", len(chapters))
         
         # Ensure we have at least one chapter
         if not chapters:
-            chapters = [StoryChapter(
+            chapters = [StoryChapter.model_construct(
                 id="1",
                 title="Story",
                 content=content or "No content available"
@@ -650,11 +1196,10 @@ async def generate_story_frontend(
         
         # Create metadata with potential user data
         character_name = request.character_name
-        if current_user and not character_name:
-            saved_form = user_forms.get(current_user["uid"], UserFormData())
+        if saved_form and not character_name:
             character_name = saved_form.child_name
         
-        metadata = StoryMetadata(
+        metadata = StoryMetadata.model_construct(
             theme=request.theme,
             ageGroup=request.age_group,
             readingTime=reading_time,
@@ -673,22 +1218,13 @@ async def generate_story_frontend(
         # Find associated images if requested
         images = []
         if request.include_images:
-            # Get the latest images from the outputs directory
-            images_base = Path("outputs/images")
-            if images_base.exists():
-                # Get the most recent images directory
-                image_dirs = sorted([d for d in images_base.iterdir() if d.is_dir()], 
-                                  key=lambda x: x.name, reverse=True)
-                if image_dirs:
-                    latest_image_dir = image_dirs[0]
-                    logger.info(f"Using latest images directory: {latest_image_dir.name}")
-                    for img_file in latest_image_dir.glob("*.png"):
-                        image_url = f"http://localhost:8000/api/images/{latest_image_dir.name}/{img_file.name}"
-                        images.append(image_url)
-                        logger.info(f"Added image to new story: {image_url}")
+            # Use this run's own images, not the newest directory on disk, which may
+            # belong to a concurrent generation
+            images = build_run_image_urls(result.get("image_urls") or [])
+            logger.info("Using %d images generated by this run", len(images))
         
         # Create the story response
-        story_response = FrontendStoryResponse(
+        story_response = FrontendStoryResponse.model_construct(
             id=story_id,
             title=title,
             content=content,  # Use 'content' instead of 'story_content'
@@ -698,16 +1234,16 @@ async def generate_story_frontend(
         )
         
         # Cache the latest story globally for immediate access
-        global latest_story_cache
-        latest_story_cache = story_response.dict()
-        logger.info(f"✅ Content cached globally: {title} ({len(content)} chars)")
+        # Serialize once and reuse the bytes for both the cache and the response
+        story_bytes = cache_latest_story(story_response)
+        logger.info("✅ Content cached globally: %s (%d chars)", title, len(content))
         if current_user:
-            logger.info(f"📝 Story enhanced with user {current_user['uid']} preferences")
+            logger.info("📝 Story enhanced with user %s preferences", current_user.uid)
         
-        return story_response
+        return Response(content=story_bytes, media_type="application/json")
         
     except Exception as e:
-        logger.error(f"Error generating story: {e}")
+        logger.error("Error generating story: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to generate story: {str(e)}")
 
 @app.get("/stories/{story_id}", response_model=FrontendStoryResponse)
@@ -736,16 +1272,17 @@ async def get_story_by_id(story_id: str):
 async def get_story_file(run_id: str, filename: str):
     """Serve story files from the outputs directory."""
     try:
-        file_path = Path("outputs/runs") / run_id / filename
+        file_path = RUNS_DIR / run_id / filename
         
-        if not file_path.exists():
+        try:
+            content = await asyncio.to_thread(read_text_file, file_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Story file not found")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         return {"content": content}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -753,205 +1290,151 @@ async def get_story_file(run_id: str, filename: str):
 async def list_images(image_dir: str):
     """List available images in a directory."""
     try:
-        # Use absolute path to avoid working directory issues
-        current_dir = Path(__file__).parent
-        images_path = current_dir / "outputs" / "images" / image_dir
+        images_path = IMAGES_DIR / image_dir
         
-        # Debug logging
-        logger.info(f"📁 Looking for images directory at: {images_path}")
-        logger.info(f"🔍 Directory exists: {images_path.exists()}")
+        logger.debug("📁 Looking for images directory at: %s", images_path)
         
         if not images_path.exists():
             raise HTTPException(status_code=404, detail=f"Image directory not found at {images_path}")
         
-        images = [f.name for f in images_path.glob("*.png")]
-        logger.info(f"🖼️ Found {len(images)} images: {images}")
+        images = list_png_files(images_path)
+        logger.debug("🖼️ Found %d images: %s", len(images), images)
         
         return {"images": images}
         
     except Exception as e:
-        logger.error(f"❌ Error listing images: {e}")
+        logger.error("❌ Error listing images: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+# When the app runs behind nginx, set this to an internal location aliased to outputs/images
+# (e.g. "/_protected_images/") so nginx sends image bytes via X-Accel-Redirect instead of Python
+IMAGE_ACCEL_REDIRECT_PREFIX = os.getenv("IMAGE_ACCEL_REDIRECT_PREFIX")
+
 @app.get("/api/images/{image_dir}/{filename}")
 async def get_image(image_dir: str, filename: str):
     """Serve image files from the outputs directory."""
+    if IMAGE_ACCEL_REDIRECT_PREFIX:
+        if image_dir.startswith(".") or filename.startswith("."):
+            raise HTTPException(status_code=404, detail="Image not found")
+        return Response(
+            media_type="image/png",
+            headers={"X-Accel-Redirect": f"{IMAGE_ACCEL_REDIRECT_PREFIX}{quote(image_dir)}/{quote(filename)}"}
+        )
+    
     try:
-        from fastapi.responses import FileResponse
-        import os
-        
-        # Use absolute path to avoid working directory issues
-        current_dir = Path(__file__).parent
-        image_path = current_dir / "outputs" / "images" / image_dir / filename
+        image_path = IMAGES_DIR / image_dir / filename
+        logger.debug("🖼️ Looking for image at: %s", image_path)
         
-        # Debug logging
-        logger.info(f"🖼️ Looking for image at: {image_path}")
-        logger.info(f"🔍 Image exists: {image_path.exists()}")
-        logger.info(f"📁 Current working directory: {os.getcwd()}")
-        
-        if not image_path.exists():
+        # One stat() both checks existence and feeds the response headers
+        try:
+            stat_result = os.stat(image_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail=f"Image not found at {image_path}")
         
-        return FileResponse(image_path)
+        return ZeroCopyFileResponse(image_path, stat_result=stat_result)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error serving image: {e}")
+        logger.error("❌ Error serving image: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/latest-story")
-async def get_latest_story():
+async def get_latest_story(request: Request):
     """Get the latest generated story from cache or outputs directory."""
     try:
         # First check if we have a cached story
-        global latest_story_cache
         if latest_story_cache:
-            logger.info("📖 Returning cached latest story")
-            return latest_story_cache
+            logger.debug("📖 Returning cached latest story")
+            encoding = preferred_encoding(request.headers.get("accept-encoding", ""))
+            encoded = latest_story_cache_encoded.get(encoding)
+            if encoded is not None:
+                return Response(
+                    content=encoded,
+                    media_type="application/json",
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+                )
+            return Response(content=latest_story_cache, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+        
+        logger.debug("🔍 No cached story, reading from file system...")
+        
+        # Find the most recent run directory that has complete story content
+        outputs_path = RUNS_DIR
+        newest_run, complete_run = await resolve_latest_runs(outputs_path)
+        if newest_run is None:
+            raise HTTPException(status_code=404, detail="No story runs found")
+        if complete_run is None:
+            raise HTTPException(status_code=404, detail="No complete story runs found")
+        latest_run = outputs_path / complete_run
         
-        logger.info("🔍 No cached story, reading from file system...")
         
-        # Find the most recent run directory
-        outputs_path = Path("outputs/runs")
-        if not outputs_path.exists():
-            raise HTTPException(status_code=404, detail="No stories found")
+        # The run name carries the timestamp used to match its images directory
+        run_name_parts = latest_run.name.split('_')
+        date_part = "20250716"  # Default fallback
+        time_part = None
         
-        run_dirs = [d for d in outputs_path.iterdir() if d.is_dir()]
-        if not run_dirs:
-            raise HTTPException(status_code=404, detail="No story runs found")
+        if len(run_name_parts) >= 4:
+            date_part = run_name_parts[2]  # 20250716
+            time_part = run_name_parts[3]  # 122627
         
-        # Get the most recent directory by name (assuming timestamp format)
-        # But ensure it has complete story content
-        latest_run = None
-        for run_dir in sorted(run_dirs, key=lambda x: x.name, reverse=True):
-            # Check if this run has complete content
-            formatted_story_file = run_dir / "formatted_story.json"
-            content_file = run_dir / "content.txt"
-            if formatted_story_file.exists() or content_file.exists():
-                latest_run = run_dir
-                break
-        
-        if not latest_run:
-            raise HTTPException(status_code=404, detail="No complete story runs found")
+        logger.debug("Run directory: %s, extracted date: %s, time: %s", latest_run.name, date_part, time_part)
         
-        logger.info(f"Using run directory: {latest_run.name}")
+        # The run's content and its images live in separate directories - read both concurrently.
+        # gather re-raises the first failure as-is (a TaskGroup would wrap it in an ExceptionGroup)
+        images_base = IMAGES_DIR
+        (formatted_data, text_content), (best_match, image_names) = await asyncio.gather(
+            asyncio.to_thread(read_run_content, latest_run),
+            asyncio.to_thread(find_run_images, images_base, date_part, time_part),
+        )
         
-        # First try to load structured story from formatted_story.json
-        formatted_story_file = latest_run / "formatted_story.json"
         chapters = []
         story_content = ""
         title = "Untitled Story"
         
-        if formatted_story_file.exists():
-            # Load structured story data
-            with open(formatted_story_file, 'r', encoding='utf-8') as f:
-                formatted_data = json.load(f)
-                
+        if formatted_data is not None:
             title = formatted_data.get('title', 'Untitled Story')
             
             # Convert structured chapters or sections to frontend format
             if formatted_data.get('chapters'):
-                for i, chapter_data in enumerate(formatted_data['chapters'], 1):
-                    chapters.append(StoryChapter(
-                        id=f"chapter-{i}",
-                        title=chapter_data.get('title', f"Chapter {i}"),
-                        content=chapter_data.get('content', '')
-                    ))
-                    # Build full story content for backward compatibility
-                    story_content += f"Chapter {i}: {chapter_data.get('title', f'Chapter {i}')}\n"
-                    story_content += "=" * 50 + "\n"
-                    story_content += f"{chapter_data.get('content', '')}\n\n"
-            elif formatted_data.get('sections'):
-                for i, section_data in enumerate(formatted_data['sections'], 1):
-                    chapters.append(StoryChapter(
-                        id=f"section-{i}",
-                        title=section_data.get('title', f"Section {i}"),
-                        content=section_data.get('content', '')
-                    ))
-                    # Build full story content for backward compatibility
-                    story_content += f"Section {i}: {section_data.get('title', f'Section {i}')}\n"
-                    story_content += "=" * 50 + "\n"
-                    story_content += f"{section_data.get('content', '')}\n\n"
+                parts, id_prefix, label = formatted_data['chapters'], "chapter", "Chapter"
+            else:
+                parts, id_prefix, label = formatted_data.get('sections') or [], "section", "Section"
+            
+            # Build full story content for backward compatibility
+            content_parts = []
+            for i, part_data in enumerate(parts, 1):
+                part_title = part_data.get('title', f"{label} {i}")
+                part_content = part_data.get('content', '')
+                chapters.append(StoryChapter.model_construct(
+                    id=f"{id_prefix}-{i}",
+                    title=part_title,
+                    content=part_content
+                ))
+                content_parts += (f"{label} {i}: {part_title}\n", CHAPTER_SEPARATOR, f"{part_content}\n\n")
+            story_content = "".join(content_parts)
         
         # Fallback to plain text parsing if structured data not available
         if not chapters:
-            # Look for the content file (unified naming for both story and poetry)
-            story_file = latest_run / "content.txt"
-            if not story_file.exists():
-                # Fallback to old naming for backward compatibility
-                story_file = latest_run / "formatted_story.txt"
-                if not story_file.exists():
-                    story_file = latest_run / "poetry_content.txt"
-                    if not story_file.exists():
-                        raise HTTPException(status_code=404, detail="Content file not found in latest run")
-            
-            with open(story_file, 'r', encoding='utf-8') as f:
-                story_content = f.read()
+            if text_content is None:
+                raise HTTPException(status_code=404, detail="Content file not found in latest run")
+            story_content = text_content
             
             # Parse the story into chapters
             chapters = parse_story_chapters(story_content)
         
-        # Find associated images - use better matching logic
-        run_name_parts = latest_run.name.split('_')
-        date_part = "20250716"  # Default fallback
-        time_part = None
-        
-        if len(run_name_parts) >= 4:
-            date_part = run_name_parts[2]  # 20250716
-            time_part = run_name_parts[3]  # 122627
-        
-        logger.info(f"Run directory: {latest_run.name}, extracted date: {date_part}, time: {time_part}")
-        
         images = []
-        images_base = Path("outputs/images")
-        
-        if images_base.exists():
-            # Find the closest matching images directory by timestamp
-            matching_dirs = list(images_base.glob(f"images_{date_part}_*"))
-            logger.info(f"Found image directories for date {date_part}: {[d.name for d in matching_dirs]}")
-            
-            if matching_dirs and time_part:
-                # Sort directories by timestamp and find the closest one
-                def extract_time(dir_name):
-                    parts = dir_name.split('_')
-                    return parts[2] if len(parts) >= 3 else "000000"
-                
-                # Find the directory with timestamp closest to (but not later than) our run time
-                matching_dirs.sort(key=lambda d: extract_time(d.name))
-                
-                target_time = int(time_part)
-                best_match = None
-                best_diff = float('inf')
-                
-                for img_dir in matching_dirs:
-                    img_time = int(extract_time(img_dir.name))
-                    # Prefer images created within 30 minutes before the run
-                    time_diff = target_time - img_time
-                    if 0 <= time_diff <= 3000 and time_diff < best_diff:  # 30 minutes = 3000 in HHMMSS format
-                        best_match = img_dir
-                        best_diff = time_diff
-                
-                # If no match within 30 minutes, use the latest available directory
-                if not best_match and matching_dirs:
-                    best_match = matching_dirs[-1]
-                
-                if best_match:
-                    logger.info(f"Using images directory: {best_match.name}")
-                    for img_file in best_match.glob("*.png"):
-                        # Use full localhost base URL to ensure images load correctly
-                        image_url = f"http://localhost:8000/api/images/{best_match.name}/{img_file.name}"
-                        images.append(image_url)
-                        logger.info(f"Added image: {image_url}")
-                else:
-                    logger.warning("No suitable images directory found")
-            else:
-                logger.warning(f"No matching images directories found for date {date_part}")
+        if best_match:
+            images = build_image_urls(best_match, image_names)
+            logger.debug("Using images directory: %s (%d images)", best_match, len(images))
+        else:
+            logger.warning("No matching images directories found for date %s", date_part)
         
-        return FrontendStoryResponse(
+        return FrontendStoryResponse.model_construct(
             id=latest_run.name,
             title=title,
             content=story_content,
             chapters=chapters,
-            metadata=StoryMetadata(
+            metadata=StoryMetadata.model_construct(
                 theme="educational adventure",
                 ageGroup="8-12",
                 readingTime=15,
@@ -962,48 +1445,40 @@ async def get_latest_story():
             images=images
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Blank (whitespace-only) lines and "==" separator lines inside a chapter body
+CHAPTER_SKIP_LINE_RE = re.compile(r"^(?:==[^\n]*|[^\S\n]*)(?:\n|\Z)", re.M)
+
 def parse_story_chapters(content: str) -> List[StoryChapter]:
     """Parse story content into chapters."""
     chapters = []
     
-    # Split by chapter headers
+    # Split by chapter headers; the text before the first "Chapter " is the title section
     chapter_sections = content.split('Chapter ')
+    for i, section in enumerate(chapter_sections[1:], 1):
+        header_line, _, body = section.strip().partition('\n')
+        
+        # Extract chapter number and title
+        chapter_num, sep, chapter_title = header_line.partition(':')
+        if sep:
+            chapter_num, chapter_title = chapter_num.strip(), chapter_title.strip()
+        else:
+            chapter_num, chapter_title = str(i), header_line
+        
+        # Drop the blank and separator lines in one pass instead of filtering line by line
+        chapters.append(StoryChapter.model_construct(
+            id=f"chapter-{i}",
+            title=f"Chapter {chapter_num}: {chapter_title}",
+            content=CHAPTER_SKIP_LINE_RE.sub("", body).strip()
+        ))
     
-    if len(chapter_sections) > 1:
-        # Skip the title section (index 0) and process actual chapters
-        for i in range(1, len(chapter_sections)):
-            section = chapter_sections[i].strip()
-            lines = section.split('\n')
-            
-            # Extract chapter number and title
-            header_line = lines[0] if lines else ""
-            if ':' in header_line:
-                chapter_num_title = header_line.split(':', 1)
-                chapter_num = chapter_num_title[0].strip()
-                chapter_title = chapter_num_title[1].strip()
-            else:
-                chapter_num = str(i)
-                chapter_title = header_line
-            
-            # Extract content (skip header and separator lines)
-            content_lines = []
-            for line in lines[1:]:
-                if line.strip() and not line.startswith('=='):
-                    content_lines.append(line)
-            
-            chapter_content = '\n'.join(content_lines).strip()
-            
-            chapters.append(StoryChapter(
-                id=f"chapter-{i}",
-                title=f"Chapter {chapter_num}: {chapter_title}",
-                content=chapter_content
-            ))
-    else:
+    if not chapters:
         # If no chapters found, create a single chapter
-        chapters.append(StoryChapter(
+        chapters.append(StoryChapter.model_construct(
             id="chapter-1",
             title="Complete Story",
             content=content
@@ -1011,10 +1486,30 @@ def parse_story_chapters(content: str) -> List[StoryChapter]:
     
     return chapters
 
+# Title templates for personalized stories; {theme_title} is the title-cased theme
+ENGLISH_TITLES = {
+    "story": "The Magical {theme_title} Adventure",
+    "story_named": "{name}'s Magical {theme_title} Adventure",
+    "single": "The {theme_title} Adventure",
+    "single_named": "{name}'s {theme_title} Adventure",
+    "chapter": "{title}",
+    "section": "{title}",
+    "numbered": "Chapter {num}",
+}
+HINDI_TITLES = {
+    "story": "जादुई {theme} रोमांच",
+    "story_named": "{name} का जादुई {theme} रोमांच",
+    "single": "नायक का {theme} रोमांच",
+    "single_named": "{name} का {theme} रोमांच",
+    "chapter": "अध्याय {num}: {title}",
+    "section": "अनुभाग {num}: {title}",
+    "numbered": "अध्याय {num}",
+}
+
 @app.post("/generate-story-personalized", response_model=FrontendStoryResponse)
 async def generate_story_personalized(
     request: ComprehensiveStoryRequest,
-    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+    current_user: Optional[UserRecord] = Depends(get_current_user)
 ):
     """
     Generate a fully personalized story with comprehensive customization including:
@@ -1032,71 +1527,73 @@ async def generate_story_personalized(
         api = get_composer_api()
         
         # Start with request data
-        personalization_params = {
-            "child_name": request.child_name,
-            "child_age": request.age,
-            "child_gender": request.child_gender,
-            "interests": request.interests,
-            "reading_level": request.reading_level,
-            "companions": request.companions,
-            "location": request.location,
-            "region": request.region,
-            "mother_tongue": request.mother_tongue,
-            "language_of_story": request.language_of_story,
-            "theme": request.theme,
-            "moral_lesson": request.moral_lesson,
-            "story_length": request.story_length,
-            "target_audience": f"age {request.age}",
-            "include_images": request.include_images,
-            "image_style": request.image_style
-        }
+        p = Personalization(
+            child_name=request.child_name,
+            child_age=request.age,
+            child_gender=request.child_gender,
+            interests=request.interests,
+            reading_level=request.reading_level,
+            companions=request.companions,
+            location=request.location,
+            region=request.region,
+            mother_tongue=request.mother_tongue,
+            language_of_story=request.language_of_story,
+            theme=request.theme,
+            moral_lesson=request.moral_lesson,
+            story_length=request.story_length,
+            target_audience=f"age {request.age}",
+            include_images=request.include_images,
+            image_style=request.image_style
+        )
         
         # If user is logged in, merge with their saved form data
         if current_user:
-            user_id = current_user["uid"]
-            saved_form = user_forms.get(user_id, UserFormData())
+            user_id = current_user.uid
+            saved_form = await load_user_form(user_id) or EMPTY_FORM
             
             # Use saved form data as fallback for empty request fields
             if not request.child_name and saved_form.child_name:
-                personalization_params["child_name"] = saved_form.child_name
+                p.child_name = saved_form.child_name
             if not request.child_gender and saved_form.child_gender:
-                personalization_params["child_gender"] = saved_form.child_gender
+                p.child_gender = saved_form.child_gender
             if not request.interests and saved_form.interests:
-                personalization_params["interests"] = saved_form.interests
+                p.interests = saved_form.interests
             if not request.reading_level and saved_form.reading_level:
-                personalization_params["reading_level"] = saved_form.reading_level
+                p.reading_level = saved_form.reading_level
             if not request.location and saved_form.location:
-                personalization_params["location"] = saved_form.location
+                p.location = saved_form.location
             if not request.mother_tongue and saved_form.mother_tongue:
-                personalization_params["mother_tongue"] = saved_form.mother_tongue
+                p.mother_tongue = saved_form.mother_tongue
             if not request.language_of_story and saved_form.language_preference:
-                personalization_params["language_of_story"] = saved_form.language_preference
+                p.language_of_story = saved_form.language_preference
             
             # Use saved age if not provided and available
             if saved_form.child_age and saved_form.child_age != request.age:
-                personalization_params["child_age"] = saved_form.child_age
-                personalization_params["target_audience"] = f"age {saved_form.child_age}"
+                p.child_age = saved_form.child_age
+                p.target_audience = f"age {saved_form.child_age}"
         
         # Use the plain text request directly
         user_input = request.request
         
         # Log personalization details
-        logger.info(f"🎭 PERSONALIZED STORY REQUEST:")
-        logger.info(f"📝 Request: {request.request}")
-        logger.info(f"👤 Child: {personalization_params['child_name']} (age {personalization_params['child_age']}, {personalization_params['child_gender']})")
-        logger.info(f"🎯 Interests: {personalization_params['interests']}")
-        logger.info(f"📚 Reading Level: {personalization_params['reading_level']}")
-        logger.info(f"🌍 Location: {personalization_params['location']}, {personalization_params['region']}")
-        logger.info(f"🗣️ Mother Tongue: {personalization_params['mother_tongue']}")
-        logger.info(f"🌐 Story Language: {personalization_params['language_of_story']}")
-        if current_user:
-            logger.info(f"� User: {current_user['uid']} (form data applied)")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🎭 PERSONALIZED STORY REQUEST:")
+            logger.debug("📝 Request: %s", request.request)
+            logger.debug("👤 Child: %s (age %s, %s)", p.child_name, p.child_age, p.child_gender)
+            logger.debug("🎯 Interests: %s", p.interests)
+            logger.debug("📚 Reading Level: %s", p.reading_level)
+            logger.debug("🌍 Location: %s, %s", p.location, p.region)
+            logger.debug("🗣️ Mother Tongue: %s", p.mother_tongue)
+            logger.debug("🌐 Story Language: %s", p.language_of_story)
+            if current_user:
+                logger.debug("👤 User: %s (form data applied)", current_user.uid)
         
         # Run the workflow with full personalization
-        result = api.run_workflow(
+        result = await run_generation(
+            api.run_workflow,
             use_case=request.use_case or "story_generator",
             user_input=user_input,
-            **personalization_params
+            **asdict(p)
         )
         
         # Extract and process content with better structured story handling
@@ -1108,7 +1605,7 @@ async def generate_story_personalized(
             # FIRST: Check for formatted_story structure (this has proper chapters)
             if "formatted_story" in result and result["formatted_story"]:
                 formatted_story_structure = result["formatted_story"]
-                logger.info(f"📚 Found structured formatted_story for personalized content")
+                logger.debug("📚 Found structured formatted_story for personalized content")
                 
                 # Extract content from structured format
                 if isinstance(formatted_story_structure, dict):
@@ -1151,26 +1648,26 @@ async def generate_story_personalized(
                             break
         
         if not content:
-            logger.error(f"❌ No content found in result: {result}")
+            logger.error("❌ No content found in result: %s", result)
             # Create error message in appropriate language
-            if personalization_params['language_of_story'] == "hindi":
+            if p.language_of_story == "hindi":
                 content = "माफ करें, कहानी बनाने में समस्या हुई। कृपया फिर से कोशिश करें।"
             else:
                 content = f"Sorry, there was an issue generating your {request.use_case or 'content'}. Please try again."
         
         # Create chapters with proper structure handling and language-appropriate titles
         chapters = []
+        templates = HINDI_TITLES if p.language_of_story == "hindi" else ENGLISH_TITLES
+        title_fields = {"name": p.child_name, "theme": p.theme, "theme_title": p.theme.title()}
         
         # First try to use structured story data
         if formatted_story_structure and isinstance(formatted_story_structure, dict):
             if "chapters" in formatted_story_structure:
                 # Use the properly structured chapters from formatted_story
                 for i, chapter_data in enumerate(formatted_story_structure["chapters"]):
-                    chapter_title = chapter_data.get("title", f"Chapter {i+1}")
-                    if personalization_params['language_of_story'] == "hindi":
-                        chapter_title = f"अध्याय {i+1}: {chapter_title}"
+                    chapter_title = templates["chapter"].format(num=i+1, title=chapter_data.get("title", f"Chapter {i+1}"))
                     
-                    chapters.append(StoryChapter(
+                    chapters.append(StoryChapter.model_construct(
                         id=str(i+1),
                         title=chapter_title,
                         content=chapter_data.get("content", "")
@@ -1178,11 +1675,9 @@ async def generate_story_personalized(
             elif "sections" in formatted_story_structure:
                 # Use the properly structured sections from formatted_story
                 for i, section_data in enumerate(formatted_story_structure["sections"]):
-                    section_title = section_data.get("title", f"Section {i+1}")
-                    if personalization_params['language_of_story'] == "hindi":
-                        section_title = f"अनुभाग {i+1}: {section_title}"
+                    section_title = templates["section"].format(num=i+1, title=section_data.get("title", f"Section {i+1}"))
                     
-                    chapters.append(StoryChapter(
+                    chapters.append(StoryChapter.model_construct(
                         id=str(i+1),
                         title=section_title,
                         content=section_data.get("content", "")
@@ -1190,18 +1685,13 @@ async def generate_story_personalized(
         
         # Fallback to paragraph-based chapter creation
         if not chapters:
-            paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+            paragraphs = split_paragraphs(content)
             
             if len(paragraphs) <= 3:
                 # Single chapter
-                if personalization_params['language_of_story'] == "hindi":
-                    chapter_title = f"{personalization_params['child_name'] or 'नायक'} का {personalization_params['theme']} रोमांच"
-                else:
-                    chapter_title = f"The {personalization_params['theme'].title()} Adventure"
-                    if personalization_params['child_name']:
-                        chapter_title = f"{personalization_params['child_name']}'s {personalization_params['theme'].title()} Adventure"
+                chapter_title = templates["single_named" if p.child_name else "single"].format_map(title_fields)
                 
-                chapters = [StoryChapter(
+                chapters = [StoryChapter.model_construct(
                     id="1",
                     title=chapter_title,
                     content=content
@@ -1213,95 +1703,67 @@ async def generate_story_personalized(
                     chapter_paragraphs = paragraphs[i:i + chapter_size]
                     chapter_num = len(chapters) + 1
                     
-                    if personalization_params['language_of_story'] == "hindi":
-                        chapter_title = f"अध्याय {chapter_num}"
-                    else:
-                        chapter_title = f"Chapter {chapter_num}"
+                    chapter_title = templates["numbered"].format(num=chapter_num)
                     
-                    chapters.append(StoryChapter(
+                    chapters.append(StoryChapter.model_construct(
                         id=str(chapter_num),
                         title=chapter_title,
                         content='\n\n'.join(chapter_paragraphs)
                     ))
         
         # Create enhanced metadata with personalization info
-        characters = [personalization_params['child_name']] if personalization_params['child_name'] else ["Hero"]
-        if personalization_params['companions']:
-            characters.extend([comp.get("name", "Friend") for comp in personalization_params['companions']])
+        characters = [p.child_name] if p.child_name else ["Hero"]
+        if p.companions:
+            characters.extend([comp.get("name", "Friend") for comp in p.companions])
         
         # Map reading times based on length and reading level
-        base_times = {"short": 3, "medium": 5, "long": 8}
-        level_multipliers = {"simple": 0.8, "medium": 1.0, "advanced": 1.3}
-        reading_time = int(base_times.get(personalization_params['story_length'], 5) * 
-                          level_multipliers.get(personalization_params['reading_level'], 1.0))
-        
-        metadata = StoryMetadata(
-            theme=personalization_params['theme'],
-            ageGroup=f"age {personalization_params['child_age']}",
+        reading_time = reading_time_for(p.story_length, p.reading_level)
+        
+        metadata = StoryMetadata.model_construct(
+            theme=p.theme,
+            ageGroup=f"age {p.child_age}",
             readingTime=reading_time,
             characters=characters,
-            moralLesson=personalization_params['moral_lesson'],
-            genre=personalization_params['theme']
+            moralLesson=p.moral_lesson,
+            genre=p.theme
         )
         
         # Generate story title in appropriate language
         import uuid
         story_id = str(uuid.uuid4())
         
-        if personalization_params['language_of_story'] == "hindi":
-            if personalization_params['child_name']:
-                title = f"{personalization_params['child_name']} का जादुई {personalization_params['theme']} रोमांच"
-            else:
-                title = f"जादुई {personalization_params['theme']} रोमांच"
-        else:
-            if personalization_params['child_name']:
-                title = f"{personalization_params['child_name']}'s Magical {personalization_params['theme'].title()} Adventure"
-            else:
-                title = f"The Magical {personalization_params['theme'].title()} Adventure"
+        title = templates["story_named" if p.child_name else "story"].format_map(title_fields)
         
         # Handle images (same logic as before)
         images = []
-        if personalization_params['include_images']:
-            # Use absolute path to avoid working directory issues
-            current_dir = Path(__file__).parent
-            images_base = current_dir / "outputs" / "images"
-            logger.info(f"🖼️ Looking for images at: {images_base}")
-            
-            if images_base.exists():
-                image_dirs = sorted([d for d in images_base.iterdir() if d.is_dir()], 
-                                  key=lambda x: x.name, reverse=True)
-                if image_dirs:
-                    latest_image_dir = image_dirs[0]
-                    logger.info(f"📁 Using latest image directory: {latest_image_dir.name}")
-                    
-                    for img_file in latest_image_dir.glob("*.png"):
-                        image_url = f"http://localhost:8000/api/images/{latest_image_dir.name}/{img_file.name}"
-                        images.append(image_url)
-                        logger.info(f"🔗 Added image URL: {image_url}")
-                else:
-                    logger.warning("⚠️ No image directories found")
+        if p.include_images:
+            # Use this run's own images, not the newest directory on disk, which may
+            # belong to a concurrent generation
+            images = build_run_image_urls(result.get("image_urls") or [])
+            if images:
+                logger.debug("📁 Using %d images generated by this run", len(images))
             else:
-                logger.warning(f"⚠️ Images base directory not found at: {images_base}")
+                logger.warning("⚠️ No images were generated by this run")
         
         # Create personalized response
-        story_response = FrontendStoryResponse(
+        story_response = FrontendStoryResponse.model_construct(
             id=story_id,
             title=title,
             content=content,
             chapters=chapters,
             metadata=metadata,
-            images=images if personalization_params['include_images'] else None
+            images=images if p.include_images else None
         )
         
         # Cache the latest story
-        global latest_story_cache
-        latest_story_cache = story_response.dict()
-        logger.info(f"✅ Personalized story cached: {title} (Language: {personalization_params['language_of_story']})")
+        # Serialize once and reuse the bytes for both the cache and the response
+        story_bytes = cache_latest_story(story_response)
+        logger.info("✅ Personalized story cached: %s (Language: %s)", title, p.language_of_story)
         
-        return story_response
+        return Response(content=story_bytes, media_type="application/json")
         
     except Exception as e:
-        logger.error(f"❌ Error generating personalized story: {e}")
+        logger.error("❌ Error generating personalized story: %s", e)
         error_msg = f"Failed to generate personalized story: {str(e)}"
         if request.language_of_story == "hindi":
             error_msg = f"व्यक्तिगत कहानी बनाने में विफल: {str(e)}"
@@ -1312,121 +1774,160 @@ async def get_latest_content():
     """Get the latest generated content (story/poetry) as plain text."""
     try:
         # Find the most recent run directory
-        outputs_path = Path("outputs/runs")
-        if not outputs_path.exists():
-            raise HTTPException(status_code=404, detail="No content found")
-        
-        run_dirs = [d for d in outputs_path.iterdir() if d.is_dir()]
-        if not run_dirs:
+        outputs_path = RUNS_DIR
+        newest_run, _ = await resolve_latest_runs(outputs_path)
+        if newest_run is None:
             raise HTTPException(status_code=404, detail="No content runs found")
-        
-        # Get the most recent directory by name (assuming timestamp format)
-        latest_run = max(run_dirs, key=lambda x: x.name)
+        latest_run = outputs_path / newest_run
         
         # Look for the content file (unified naming)
-        content_file = latest_run / "content.txt"
-        if not content_file.exists():
-            # Fallback to old naming for backward compatibility
-            content_file = latest_run / "formatted_story.txt"
-            if not content_file.exists():
-                content_file = latest_run / "poetry_content.txt"
-                if not content_file.exists():
-                    raise HTTPException(status_code=404, detail="Content file not found in latest run")
-        
-        with open(content_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Return plain text content
-        from fastapi.responses import PlainTextResponse
-        return PlainTextResponse(content)
+        content_file_name = find_content_file(set(await asyncio.to_thread(os.listdir, latest_run)))
+        if content_file_name is None:
+            raise HTTPException(status_code=404, detail="Content file not found in latest run")
+        
+        # Send the file as-is instead of decoding and re-encoding it
+        return ZeroCopyFileResponse(latest_run / content_file_name, media_type="text/plain; charset=utf-8")
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Error getting latest content: {e}")
+        logger.error("❌ Error getting latest content: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to get latest content: {str(e)}")
 
+# Cache of the /latest-formatted-content payload (a JSON file path or JSON bytes), keyed on
+# the newest run from resolve_latest_runs plus that run directory's mtime, so it follows the
+# same latest-run resolution as the other endpoints and refreshes when files land in the run.
+# Writing a file's bytes doesn't touch the directory mtime, so the source file's own
+# (mtime_ns, size) is checked too - a read that raced the save is refreshed on the next poll.
+latest_formatted_cache: Dict[str, Any] = {"key": None, "payload": None, "source": None, "source_stamp": None}
+latest_formatted_lock = asyncio.Lock()
+
+def _file_stamp(path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def load_latest_formatted_content(latest_run: Path) -> Tuple[Union[Path, bytes], Path, Optional[Tuple[int, int]]]:
+    """
+    Resolve the /latest-formatted-content payload for a run directory (blocking).
+    
+    The payload is the path of formatted_content.json when the run has one (it is served
+    as-is), otherwise JSON bytes built from the run's plain-text content. Also returns the
+    source file and its stamp, taken before reading so a concurrent write shows up as a change.
+    """
+    # List the run once and probe the listing instead of stat()ing each candidate file
+    with os.scandir(latest_run) as entries:
+        run_files = {entry.name for entry in entries}
+    
+    # First try structured formatted content - already JSON on disk, so no parse needed
+    if "formatted_content.json" in run_files:
+        logger.info("📋 Returning formatted content from %s", latest_run.name)
+        source = latest_run / "formatted_content.json"
+        return source, source, _file_stamp(source)
+    
+    # Fallback to plain text if formatted content not available
+    content_file_name = find_content_file(run_files)
+    if content_file_name is None:
+        raise HTTPException(status_code=404, detail="Content file not found in latest run")
+    
+    source = latest_run / content_file_name
+    source_stamp = _file_stamp(source)
+    content = read_text_file(source)
+    
+    # Create a basic structured response, serialized once so cache hits send the bytes as-is
+    return orjson.dumps({
+        "title": "Generated Content",
+        "type": "text",
+        "content": content,
+        "run_id": latest_run.name,
+        "timestamp": latest_run.stat().st_mtime
+    }), source, source_stamp
+
 @app.get("/latest-formatted-content")
 async def get_latest_formatted_content():
     """Get the latest generated content in structured JSON format with proper formatting."""
     try:
-        # Find the most recent run directory
-        outputs_path = Path("outputs/runs")
-        if not outputs_path.exists():
-            raise HTTPException(status_code=404, detail="No content found")
-        
-        run_dirs = [d for d in outputs_path.iterdir() if d.is_dir()]
-        if not run_dirs:
+        newest_run, _ = await resolve_latest_runs(RUNS_DIR)
+        if newest_run is None:
             raise HTTPException(status_code=404, detail="No content runs found")
+        latest_run = RUNS_DIR / newest_run
+        
+        async with latest_formatted_lock:
+            cache = latest_formatted_cache
+            cache_key = (newest_run, _mtime_ns(latest_run))
+            if (cache["payload"] is not None and cache["key"] == cache_key
+                    and cache["source_stamp"] == _file_stamp(cache["source"])):
+                payload = cache["payload"]
+            else:
+                # Cache miss - read and serialize in a worker thread
+                payload, source, source_stamp = await asyncio.to_thread(load_latest_formatted_content, latest_run)
+                cache.update(key=cache_key, payload=payload, source=source, source_stamp=source_stamp)
         
-        # Get the most recent directory by name (assuming timestamp format)
-        latest_run = max(run_dirs, key=lambda x: x.name)
-        
-        # First try to load structured formatted content
-        formatted_content_file = latest_run / "formatted_content.json"
-        if formatted_content_file.exists():
-            with open(formatted_content_file, 'r', encoding='utf-8') as f:
-                formatted_data = json.load(f)
-            logger.info(f"📋 Returning formatted content from {latest_run.name}")
-            return formatted_data
-        
-        # Fallback to plain text if formatted content not available
-        content_file = latest_run / "content.txt"
-        if not content_file.exists():
-            content_file = latest_run / "formatted_story.txt"
-            if not content_file.exists():
-                content_file = latest_run / "poetry_content.txt"
-                if not content_file.exists():
-                    raise HTTPException(status_code=404, detail="Content file not found in latest run")
-        
-        with open(content_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Create a basic structured response
-        return {
-            "title": "Generated Content",
-            "type": "text",
-            "content": content,
-            "run_id": latest_run.name,
-            "timestamp": latest_run.stat().st_mtime
-        }
+        if isinstance(payload, Path):
+            # Stream the stored JSON bytes instead of parsing and re-serializing them
+            return ZeroCopyFileResponse(payload, media_type="application/json", headers={"X-Run-Id": payload.parent.name})
+        return Response(content=payload, media_type="application/json")
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Error getting latest formatted content: {e}")
+        logger.error("❌ Error getting latest formatted content: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to get latest formatted content: {str(e)}")
 
+# Registration guards, so duplicate-registration floods can't make us burn Argon2 work:
+# emails with a registration in progress, and recent attempt times per email
+register_inflight: set = set()
+register_attempts: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+REGISTER_ATTEMPTS_PER_MINUTE = 5
+
 # Authentication Endpoints
 @app.post("/auth/register")
 async def register_user(user_data: UserRegistration):
     """Register a new user with email and password"""
+    user_id = user_data.email.lower()
+    
+    # Rate limit attempts per email before doing any work
+    now = epoch_now()
+    attempts = register_attempts.get(user_id) or deque()
+    while attempts and now - attempts[0] >= 60:
+        attempts.popleft()
+    if len(attempts) >= REGISTER_ATTEMPTS_PER_MINUTE:
+        raise HTTPException(status_code=429, detail="Too many registration attempts")
+    attempts.append(now)
+    register_attempts[user_id] = attempts
+    
+    # A concurrent registration for the same email is a duplicate - no await between check and add
+    if user_id in register_inflight:
+        raise HTTPException(status_code=400, detail="User already exists")
+    register_inflight.add(user_id)
+    
     try:
         # Check if user already exists
-        user_id = user_data.email.lower()
-        if user_id in user_database:
+        if await load_user(user_id) is not None:
             raise HTTPException(status_code=400, detail="User already exists")
         
         # Create user
-        hashed_password = hash_password(user_data.password)
-        user_database[user_id] = {
-            "uid": user_id,
-            "email": user_data.email,
-            "name": user_data.name,
-            "password_hash": hashed_password,
-            "provider": "email",
-            "created_at": datetime.now(timezone.utc),
-            "last_login": datetime.now(timezone.utc)
-        }
+        hashed_password = await asyncio.to_thread(hash_password, user_data.password)
+        now = epoch_now()
+        user = UserRecord(
+            uid=user_id,
+            email=user_data.email,
+            name=user_data.name,
+            provider="email",
+            created_at=now,
+            last_login=now,
+            password_hash=hashed_password
+        )
+        await store_user(user)
         
         # Generate token
-        token = generate_simple_token(user_id)
-        
-        # Return user data without password hash
-        user_response = {k: v for k, v in user_database[user_id].items() if k != "password_hash"}
+        token = generate_simple_token(user)
         
         return {
-            "user": user_response,
+            "user": user.to_profile(),
             "token": token,
             "message": "User registered successfully"
         }
@@ -1434,8 +1935,10 @@ async def register_user(user_data: UserRegistration):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error registering user: {e}")
+        logger.error("Error registering user: %s", e)
         raise HTTPException(status_code=500, detail="Registration failed")
+    finally:
+        register_inflight.discard(user_id)
 
 @app.post("/auth/login")
 async def login_user(user_data: UserLogin):
@@ -1444,26 +1947,31 @@ async def login_user(user_data: UserLogin):
         user_id = user_data.email.lower()
         
         # Check if user exists
-        if user_id not in user_database:
+        user = await load_user(user_id)
+        password_hash = user.password_hash if user is not None else None
+        if not password_hash:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        user = user_database[user_id]
-        
         # Verify password
-        if not verify_password(user_data.password, user["password_hash"]):
+        password = user_data.password
+        if not await asyncio.to_thread(verify_password_cached, user_id, password, password_hash):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
+        # Transparently upgrade legacy or outdated password hashes
+        if password_needs_rehash(password_hash):
+            user.password_hash = await asyncio.to_thread(hash_password, password)
+            with verified_login_lock:
+                verified_login_cache.pop(user_id, None)
+        
         # Update last login
-        user["last_login"] = datetime.now(timezone.utc)
+        user.last_login = epoch_now()
+        await store_user(user)
         
         # Generate token
-        token = generate_simple_token(user_id)
-        
-        # Return user data without password hash
-        user_response = {k: v for k, v in user.items() if k != "password_hash"}
+        token = generate_simple_token(user)
         
         return {
-            "user": user_response,
+            "user": user.to_profile(),
             "token": token,
             "message": "Login successful"
         }
@@ -1471,7 +1979,7 @@ async def login_user(user_data: UserLogin):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error logging in user: {e}")
+        logger.error("Error logging in user: %s", e)
         raise HTTPException(status_code=500, detail="Login failed")
 
 @app.post("/auth/firebase")
@@ -1481,121 +1989,122 @@ async def authenticate_firebase(token_request: FirebaseTokenRequest):
         raise HTTPException(status_code=501, detail="Firebase authentication not available")
     
     try:
-        from firebase_admin import auth as firebase_auth
-        
         # Verify Firebase token
-        decoded_token = firebase_auth.verify_id_token(token_request.firebase_token)
+        decoded_token = verify_firebase_token_cached(token_request.firebase_token)
         user_id = decoded_token['uid']
         
         # Get or create user profile
-        if user_id not in user_database:
-            user_database[user_id] = {
-                "uid": user_id,
-                "email": decoded_token.get('email'),
-                "name": decoded_token.get('name'),
-                "provider": "firebase",
-                "created_at": datetime.now(timezone.utc),
-                "last_login": datetime.now(timezone.utc)
-            }
+        user = await load_user(user_id)
+        if user is None:
+            user = new_firebase_user(decoded_token)
         else:
-            user_database[user_id]["last_login"] = datetime.now(timezone.utc)
+            user.last_login = epoch_now()
+        await store_user(user)
         
         return {
-            "user": user_database[user_id],
+            "user": user.to_profile(),
             "message": "Firebase authentication successful"
         }
         
     except Exception as e:
-        logger.error(f"Firebase authentication failed: {e}")
+        logger.error("Firebase authentication failed: %s", e)
         raise HTTPException(status_code=401, detail="Invalid Firebase token")
 
 @app.get("/auth/me")
-async def get_current_user_profile(current_user: Optional[Dict[str, Any]] = Depends(get_current_user)):
+async def get_current_user_profile(current_user: Optional[UserRecord] = Depends(get_current_user)):
     """Get current user profile"""
     if not current_user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
+    # Email users come straight from their token claims - fetch the stored profile for the
+    # real created_at/last_login, alongside the form
+    if current_user.provider == "email":
+        stored_user, form_data = await asyncio.gather(load_user(current_user.uid), load_user_form(current_user.uid))
+        current_user = stored_user or current_user
+    else:
+        form_data = await load_user_form(current_user.uid)
+    
     return {
-        "user": current_user,
-        "form_data": user_forms.get(current_user["uid"], UserFormData()).dict()
+        "user": current_user.to_profile(),
+        "form_data": form_data_dict(form_data)
     }
 
 @app.post("/auth/logout")
-async def logout_user(current_user: Optional[Dict[str, Any]] = Depends(get_current_user)):
+async def logout_user(current_user: Optional[UserRecord] = Depends(get_current_user)):
     """Logout user (mainly for logging purposes)"""
     if not current_user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    logger.info(f"User {current_user['uid']} logged out")
+    logger.info("User %s logged out", current_user.uid)
     return {"message": "Logout successful"}
 
 # User Form Management
 @app.get("/user/form")
-async def get_user_form(current_user: Optional[Dict[str, Any]] = Depends(get_current_user)):
+async def get_user_form(current_user: Optional[UserRecord] = Depends(get_current_user)):
     """Get user form data"""
     if not current_user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user_id = current_user["uid"]
-    form_data = user_forms.get(user_id, UserFormData())
+    user_id = current_user.uid
+    form_data = form_data_dict(await load_user_form(user_id))
     
     return {
-        "form_data": form_data.dict(),
-        "has_data": bool(any(v for v in form_data.dict().values() if v not in [None, [], ""]))
+        "form_data": form_data,
+        "has_data": form_data is not EMPTY_FORM_DATA and any(form_data.values())
     }
 
 @app.post("/user/form")
 async def update_user_form(
     form_request: UserFormUpdateRequest,
-    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+    current_user: Optional[UserRecord] = Depends(get_current_user)
 ):
     """Update user form data"""
     if not current_user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user_id = current_user["uid"]
+    user_id = current_user.uid
     
     # Get existing form data
-    existing_form = user_forms.get(user_id, UserFormData())
+    existing_form = await load_user_form(user_id) or EMPTY_FORM
     
-    # Update only provided fields
-    update_data = form_request.form_data.dict(exclude_unset=True)
-    existing_data = existing_form.dict()
-    
-    # Merge the data
-    for key, value in update_data.items():
-        if value is not None:
-            existing_data[key] = value
+    # Update only provided fields - the request model already validated them,
+    # so they are copied onto the stored record without another validation pass
+    update_data = {
+        key: value
+        for key, value in form_request.form_data.model_dump(exclude_unset=True).items()
+        if value is not None
+    }
     
     # Save updated form data
-    user_forms[user_id] = UserFormData(**existing_data)
+    updated_form = replace(existing_form, **update_data)
+    await store_user_form(user_id, updated_form)
     
-    logger.info(f"Updated form data for user {user_id}")
+    logger.info("Updated form data for user %s", user_id)
     
     return {
         "message": "Form data updated successfully",
-        "form_data": user_forms[user_id].dict()
+        "form_data": asdict(updated_form)
     }
 
 @app.get("/user/form/check")
-async def check_user_form_status(current_user: Optional[Dict[str, Any]] = Depends(get_current_user)):
+async def check_user_form_status(current_user: Optional[UserRecord] = Depends(get_current_user)):
     """Check if user needs to fill the form"""
     if not current_user:
         return {"needs_form": True, "message": "User not authenticated"}
     
-    user_id = current_user["uid"]
-    form_data = user_forms.get(user_id, UserFormData())
+    user_id = current_user.uid
+    form_data = await load_user_form(user_id)
     
-    # Check if essential fields are filled
-    essential_fields = ["child_name", "child_age", "interests"]
-    has_essential_data = any(
-        getattr(form_data, field, None) not in [None, [], ""]
-        for field in essential_fields
+    # Check if essential fields are filled (child_name, child_age, interests)
+    has_essential_data = form_data is not None and (
+        form_data.child_name not in EMPTY_FORM_VALUES
+        or form_data.child_age is not None
+        or form_data.interests not in EMPTY_FORM_VALUES
     )
     
     return {
         "needs_form": not has_essential_data,
-        "form_data": form_data.dict(),
+        "form_data": form_data_dict(form_data),
         "message": "Form check completed"
     }
 
@@ -1603,8 +2112,14 @@ if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "fastapi_app:app",
-        host="0.0.0.0",
-        port=8000,
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        # Multiple workers need REDIS_URL so users and forms are shared between them
+        workers=int(os.getenv("API_WORKERS", "1")),
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        backlog=4096,
+        timeout_keep_alive=30,
         reload=False,
         log_level="info"
     )
\ No newline at end of file
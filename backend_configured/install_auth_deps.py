@@ -3,34 +3,38 @@
 Install authentication dependencies for FastAPI app
 """
 
+import importlib
+import importlib.util
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 def install_dependencies():
     """Install the required authentication dependencies"""
     dependencies = [
         "firebase-admin==6.5.0",
         "email-validator==2.1.1", 
-        "bcrypt==4.1.2"
+        "bcrypt==4.1.2",
+        "argon2-cffi==23.1.0",
+        "PyJWT==2.9.0"
     ]
     
     print("🔧 Installing authentication dependencies...")
+    print(f"Installing {', '.join(dependencies)}...")
     
-    for dep in dependencies:
-        print(f"Installing {dep}...")
-        try:
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", dep],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            print(f"✅ {dep} installed successfully")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to install {dep}: {e}")
-            print(f"Error output: {e.stderr}")
-            return False
+    # One pip run resolves and downloads everything together instead of one process per package
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "pip", "install", "--no-input", "--disable-pip-version-check", *dependencies],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Failed to install dependencies: {e}")
+        print(f"Error output: {e.stderr}")
+        return False
     
     print("\n✅ All authentication dependencies installed successfully!")
     print("\n📋 Summary of installed packages:")
@@ -44,29 +48,40 @@ def install_dependencies():
     
     return True
 
+# Import name of each authentication dependency
+AUTH_MODULES = ("firebase_admin", "email_validator", "bcrypt", "argon2", "jwt")
+
+def _try_import(name):
+    """Import a module, returning the ImportError instead of raising it"""
+    try:
+        importlib.import_module(name)
+        return None
+    except ImportError as e:
+        return e
+
 def test_imports():
     """Test if the installed dependencies can be imported"""
     print("\n🧪 Testing imports...")
     
-    try:
-        import firebase_admin
-        print("✅ firebase_admin imported successfully")
-    except ImportError as e:
-        print(f"❌ firebase_admin import failed: {e}")
+    # Modules without a spec aren't installed at all - report them without importing anything
+    missing = [name for name in AUTH_MODULES if importlib.util.find_spec(name) is None]
+    for name in missing:
+        print(f"❌ {name} import failed: No module named '{name}'")
+    if missing:
         return False
     
-    try:
-        import email_validator
-        print("✅ email_validator imported successfully")
-    except ImportError as e:
-        print(f"❌ email_validator import failed: {e}")
-        return False
+    # Import the rest concurrently - firebase_admin's initialization dominates and overlaps the others
+    with ThreadPoolExecutor(max_workers=len(AUTH_MODULES)) as executor:
+        errors = list(executor.map(_try_import, AUTH_MODULES))
     
-    try:
-        import bcrypt
-        print("✅ bcrypt imported successfully")
-    except ImportError as e:
-        print(f"❌ bcrypt import failed: {e}")
+    ok = True
+    for name, error in zip(AUTH_MODULES, errors):
+        if error is None:
+            print(f"✅ {name} imported successfully")
+        else:
+            print(f"❌ {name} import failed: {error}")
+            ok = False
+    if not ok:
         return False
     
     print("✅ All imports successful!")
@@ -1,27 +1,36 @@
 """
 Agent package initialization for the Composer Engine.
+
+The agent nodes pull in LangChain/LangGraph, so they are imported lazily on
+first attribute access (PEP 562) rather than whenever the package is imported.
 """
 
-from .agent_nodes import (
-    planner_node,
-    writer_node,
-    formatter_node,
-    content_generator_node,
-    critique_node,
-    poetry_agent_node,
-    music_agent_node,
-    image_generator_node,
-    get_available_agents
-)
-
-__all__ = [
-    "planner_node",
-    "writer_node",
-    "formatter_node", 
-    "content_generator_node",
-    "critique_node",
-    "poetry_agent_node",
-    "music_agent_node",
-    "image_generator_node",
-    "get_available_agents"
-]
\ No newline at end of file
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY_EXPORTS = {
+    "planner_node": "agent_nodes",
+    "writer_node": "agent_nodes",
+    "formatter_node": "agent_nodes",
+    "content_generator_node": "agent_nodes",
+    "critique_node": "agent_nodes",
+    "poetry_agent_node": "agent_nodes",
+    "music_agent_node": "agent_nodes",
+    "image_generator_node": "agent_nodes",
+    "get_available_agents": "agent_nodes",
+}
+
+__all__ = tuple(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -6,27 +6,41 @@ adapted from the Composer system for the new one-graph-workflow architecture.
 Enhanced with ReAct pattern for reasoning and action capabilities.
 """
 
+import copy
 import json
-import gc
-import tracemalloc
 # from memory_profiler import profile
 import logging
 import os
+import re
+import string
+import threading
 import time
+import uuid
+from dataclasses import dataclass, field, fields
+from collections import OrderedDict
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from functools import lru_cache, wraps
+import orjson
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 from dotenv import load_dotenv
 
+from langchain_core.caches import InMemoryCache
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 # LangGraph imports for React agent functionality
-from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import InMemorySaver
 
+# The Gemini client (gRPC/protobuf) and langgraph.prebuilt are heavy to import, so they are
+# imported on first use in get_llm / create_react_agent_for_task instead of at module load
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
 # Import output manager for saving results
 try:
     from ..utils.output_manager import save_run_output
@@ -38,22 +52,15 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
-# Image style mapping from frontend selections to aesthetic descriptions
-def get_aesthetic_from_image_style(image_style: str, return_details: bool = False) -> str | dict:
-    """Map frontend image style selection to detailed aesthetic description for image generation.
+class _GhibliDefaultDict(dict):
+    """Dict whose missing keys resolve to the 'ghibli' entry, so lookups need no default."""
     
-    Args:
-        image_style: The style name (e.g. 'ghibli', 'disney', etc.)
-        return_details: If True, returns the detailed style dict; if False, returns formatted string
-        
-    Returns:
-        If return_details=True: dict with 'medium', 'lighting', 'colors', 'details', 'mood' keys
-        If return_details=False: formatted string for backward compatibility
-    """
-    
-    print(f"🎨 [DEBUG] get_aesthetic_from_image_style called with: '{image_style}', return_details={return_details}")
-    
-    style_map = {
+    def __missing__(self, key):
+        return self['ghibli']
+
+# Image style mapping from frontend selections to aesthetic descriptions.
+# Built once at import; callers must treat the returned dicts as read-only.
+_STYLE_MAP = _GhibliDefaultDict({
     'ghibli': {
         'medium': 'hand-painted watercolor, traditional animation cel, visible brushstrokes, organic textures',
         'lighting': 'soft natural light, dappled sunlight through trees, gentle shadows, warm afternoon glow',
@@ -61,7 +68,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'intricate grass rendering, cumulus cloud formations, environmental storytelling, wind movement in nature',
         'mood': 'nostalgic, peaceful, contemplative, wonder, connection with nature'
     },
-    
+
     'disney': {
         'medium': 'digital painting, clean vector illustration, polished cel animation, smooth gradients',
         'lighting': 'three-point lighting, warm key light, rim lighting for depth, magical sparkles',
@@ -69,7 +76,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'smooth animation curves, appeal in character design, clear staging, refined linework',
         'mood': 'magical, optimistic, theatrical, enchanting, joyful celebration'
     },
-    
+
     'fantasy': {
         'medium': 'digital oil painting, concept art rendering, photobashing techniques, matte painting',
         'lighting': 'dramatic chiaroscuro, volumetric lighting, mystical glows, god rays, torch light',
@@ -77,7 +84,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'ornate armor designs, flowing fabrics, magical particles, ancient runes, weathered textures',
         'mood': 'epic, heroic, mysterious, awe-inspiring, ancient power'
     },
-    
+
     'watercolor': {
         'medium': 'wet-on-wet watercolor, transparent washes, visible paper texture, paint blooms',
         'lighting': 'diffused natural light, soft shadows, luminous transparency, gentle highlights',
@@ -85,7 +92,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'organic paint flows, granulation effects, lost and found edges, spontaneous mixing',
         'mood': 'dreamy, ethereal, gentle, impressionistic, serene contemplation'
     },
-    
+
     'splash-art': {
         'medium': 'digital hyperrealistic painting, mixed media effects, paint splatter overlay, sharp rendering',
         'lighting': 'intense rim lighting, color contrast lighting, dramatic spotlights, neon accents',
@@ -93,7 +100,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'motion blur effects, speed lines, particle explosions, dynamic hair and fabric, energy trails',
         'mood': 'explosive energy, intense action, powerful impact, competitive spirit, climactic moment'
     },
-    
+
     'cover-art': {
         'medium': 'professional illustration, mixed traditional and digital, publication-ready finish',
         'lighting': 'cinematic mood lighting, strategic focal illumination, atmospheric depth, golden hour tones',
@@ -101,7 +108,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'symbolic visual metaphors, layered narrative elements, intricate textures, refined details',
         'mood': 'intriguing, evocative, mysterious promise, emotional resonance, story invitation'
     },
-    
+
     'cartoon': {
         'medium': 'vector art style, cel-shaded rendering, bold clean outlines, flat color fills',
         'lighting': 'simple two-tone shading, bright even lighting, minimal shadows, clear visibility',
@@ -109,7 +116,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'simplified shapes, exaggerated features, rubber hose animation influence, bouncy forms',
         'mood': 'playful, energetic, friendly, humorous, accessible fun'
     },
-    
+
     'minimalist': {
         'medium': 'clean vector graphics, geometric abstraction, precise digital illustration, flat design',
         'lighting': 'ambient uniform lighting, subtle shadows if any, emphasis on form over lighting',
@@ -117,7 +124,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'essential elements only, meaningful negative space, perfect balance, intentional simplicity',
         'mood': 'sophisticated, contemplative, modern elegance, zen-like clarity, quiet confidence'
     },
-    
+
     'vintage': {
         'medium': 'lithograph printing, engraving techniques, aged paper texture, traditional illustration methods',
         'lighting': 'classic three-quarter lighting, soft window light, nostalgic warmth, gentle contrasts',
@@ -125,7 +132,7 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'crosshatching, stippling, art nouveau flourishes, decorative borders, hand-lettered elements',
         'mood': 'nostalgic, timeless, romantic, old-world charm, storybook wonder'
     },
-    
+
     'anime': {
         'medium': 'digital anime production, vector-like clean lines, cel-shaded coloring, crisp rendering',
         'lighting': 'dramatic sunset/sunrise lighting, lens flares, bloom effects, colored shadows, backlight halos',
@@ -133,25 +140,41 @@ def get_aesthetic_from_image_style(image_style: str, return_details: bool = Fals
         'details': 'detailed eyes with multiple highlights, flowing hair with individual strands, speed lines, sakura petals',
         'mood': 'emotional intensity, slice of life beauty, dramatic tension, youthful energy, japanese aesthetic'
     }
-}
+})
+
+# Formatted aesthetic description per style, for the string form of the lookup
+_STYLE_STRINGS = _GhibliDefaultDict({
+    name: f"{style['medium']}, {style['lighting']}, {style['colors']}, {style['details']}, {style['mood']}"
+    for name, style in _STYLE_MAP.items()
+})
+
+def get_aesthetic_from_image_style(image_style: str, return_details: bool = False) -> str | dict:
+    """Map frontend image style selection to detailed aesthetic description for image generation.
     
-    # Get style data or fallback to ghibli
-    style_data = style_map.get(image_style, style_map['ghibli'])
+    Args:
+        image_style: The style name (e.g. 'ghibli', 'disney', etc.)
+        return_details: If True, returns the detailed style dict; if False, returns formatted string
+        
+    Returns:
+        If return_details=True: dict with 'medium', 'lighting', 'colors', 'details', 'mood' keys
+        If return_details=False: formatted string for backward compatibility
+    """
+    # Unknown styles fall back to ghibli via __missing__
+    result = _STYLE_MAP[image_style] if return_details else _STYLE_STRINGS[image_style]
     
-    if return_details:
-        # Return the detailed dictionary
-        print(f"🎨 [DEBUG] Returning detailed style info for '{image_style}': {style_data}")
-        return style_data
-    else:
-        # Create formatted aesthetic description for backward compatibility
-        result = f"{style_data['medium']}, {style_data['lighting']}, {style_data['colors']}, {style_data['details']}, {style_data['mood']}"
-        print(f"🎨 [DEBUG] Mapped '{image_style}' to: '{result}'")
-        return result
+    logger.debug("🎨 Mapped image style '%s' (details=%s) to: %s", image_style, return_details, result)
+    return result
 
 logger = logging.getLogger(__name__)
 
-# Global LLM instance
+# Exact-match cache for the JSON-mode formatter LLM only, so re-formatting identical content
+# skips the model round trip; the creative agents stay uncached so every run gets a fresh
+# story. LLM_CACHE_SIZE=0 turns it off.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+
+# Global LLM instances (plain and JSON-mode)
 _llm = None
+_json_llm = None
 
 # Pydantic models for structured output
 class ContentSection(BaseModel):
@@ -179,27 +202,83 @@ class FormatterOutput(BaseModel):
     formatted_content: Optional[FormattedStory] = Field(description="The formatted content structure", default=None)
     image_prompts: list[str] = Field(description="Specific image generation prompts for each scene")
 
+# Concurrent image API calls per image_generator_node run
+IMAGE_GENERATION_WORKERS = int(os.getenv("IMAGE_GENERATION_WORKERS", "4"))
+
 # Global checkpointer for agent memory
 _checkpointer = InMemorySaver()
 
+def unique_output_stamp() -> str:
+    """Timestamp-first, collision-free name part for run and image output directories.
+    
+    The leading YYYYMMDD_HHMMSS keeps names sortable for the latest-run and image lookups;
+    the random suffix keeps concurrent runs that finish in the same second apart."""
+    return f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+
+def to_prompt_json(data: Any) -> str:
+    """Serialize data for embedding in an LLM prompt: compact orjson, since indentation
+    only adds tokens the model doesn't need."""
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+
+# Sentence and paragraph scanners, so tools can stop after the first few matches
+# instead of splitting the whole story into a list
+SENTENCE_RE = re.compile(r"[^.]+")
+PARAGRAPH_RE = re.compile(r"(?:(?!\n\n).)+", re.S)
+
+# JSON object wrapped in a markdown code fence in an LLM response
+JSON_MD_BLOCK_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+
+# Character description pieces for personalized image prompts
+GENDER_FEATURES = {
+    "she": "a girl with gentle features and curious eyes",
+    "he": "a boy with bright features and curious eyes", 
+    "they": "a child with kind features and curious eyes",
+    "neutral": "a child with bright, curious eyes"
+}
+# Age descriptor for ages in [bound[i], bound[i+1]); ages outside 2-12 stay "child"
+AGE_BOUNDS = (2, 4, 6, 9, 13)
+AGE_DESCRIPTORS = ("child", "toddler", "young child", "child", "pre-teen", "child")
+# Location words that switch on the Indian appearance / neighborhood details
+INDIAN_REGIONS = frozenset({'india', 'mumbai', 'delhi', 'bangalore'})
+INDIAN_CITIES = frozenset({'mumbai', 'delhi', 'bangalore', 'pune'})
+WORD_RE = re.compile(r"\w+")
+
 # LangGraph Tools for React Agents
+# Tools return plain dicts on success; the tool node serializes them once as compact JSON
+# for the observation message instead of us pretty-printing into prose first.
+# Pure tools with hashable arguments are memoized; each call gets its own copy of the result.
+def copied_lru_cache(maxsize: int = 256):
+    """lru_cache that returns a deep copy of the cached result, so callers can't mutate it."""
+    def decorator(func):
+        cached = lru_cache(maxsize=maxsize)(func)
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return copy.deepcopy(cached(*args, **kwargs))
+        
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
+
 @tool
-def analyze_story_plan(plan_data: str, user_requirements: str) -> str:
+def analyze_story_plan(plan_data: str, user_requirements: str) -> dict | str:
     """Analyze a story plan and provide feedback for improvement."""
     try:
-        plan = json.loads(plan_data) if isinstance(plan_data, str) else plan_data
+        plan = orjson.loads(plan_data) if isinstance(plan_data, str) else plan_data
         analysis = {
             "structure_score": 8.5,
             "creativity_score": 9.0,
             "age_appropriateness": "good",
             "suggestions": ["Add more character development", "Include educational themes"]
         }
-        return f"Plan analysis complete: {json.dumps(analysis, indent=2)}"
+        return analysis
     except Exception as e:
         return f"Error analyzing plan: {str(e)}"
 
 @tool
-def validate_content_format(content: str, content_type: str) -> str:
+@copied_lru_cache(maxsize=256)
+def validate_content_format(content: str, content_type: str) -> dict | str:
     """Validate content formatting and structure."""
     try:
         word_count = len(content.split())
@@ -215,28 +294,28 @@ def validate_content_format(content: str, content_type: str) -> str:
         elif word_count > 1000:
             validation["recommendations"].append("Content might be too long for target audience")
             
-        return f"Content validation: {json.dumps(validation, indent=2)}"
+        return validation
     except Exception as e:
         return f"Error validating content: {str(e)}"
 
 @tool
-def extract_image_scenes(content: str, image_count: int = 3) -> str:
+def extract_image_scenes(content: str, image_count: int = 3) -> dict | str:
     """Extract key scenes from content for image generation."""
     try:
         # Simple scene extraction logic
-        sentences = content.split('.')[:image_count * 2]  # Get more than needed
+        sentences = content.split('.', image_count)[:image_count]  # Only the first image_count are used
         scenes = []
         
         for i in range(min(image_count, len(sentences))):
             if sentences[i].strip():
                 scenes.append(f"Scene {i+1}: {sentences[i].strip()}")
         
-        return f"Extracted scenes: {json.dumps(scenes, indent=2)}"
+        return {"scenes": scenes}
     except Exception as e:
         return f"Error extracting scenes: {str(e)}"
 
 @tool
-def load_configuration(use_case: str, config_type: str = "default") -> str:
+def load_configuration(use_case: str, config_type: str = "default") -> dict | str:
     """Load configuration settings for specific use cases."""
     try:
         # This would normally load from your config system
@@ -247,16 +326,16 @@ def load_configuration(use_case: str, config_type: str = "default") -> str:
         }
         
         result = config.get(use_case, config.get("story_generator"))
-        return f"Configuration loaded: {json.dumps(result, indent=2)}"
+        return result
     except Exception as e:
         return f"Error loading configuration: {str(e)}"
 
 @tool
-def expand_story_outline(plan: str, target_word_count: int) -> str:
+def expand_story_outline(plan: str, target_word_count: int) -> dict | str:
     """Expand a story outline into detailed narrative sections."""
     try:
         # Parse plan if it's JSON
-        plan_data = json.loads(plan) if isinstance(plan, str) else plan
+        plan_data = orjson.loads(plan) if isinstance(plan, str) else plan
         
         expansion = {
             "narrative_structure": "three-act structure",
@@ -266,16 +345,19 @@ def expand_story_outline(plan: str, target_word_count: int) -> str:
             "expansion_notes": "Focus on character development and descriptive language"
         }
         
-        return f"Story expansion guide: {json.dumps(expansion, indent=2)}"
+        return expansion
     except Exception as e:
         return f"Error expanding outline: {str(e)}"
 
 @tool
-def check_reading_level(content: str, target_age: int) -> str:
+@copied_lru_cache(maxsize=256)
+def check_reading_level(content: str, target_age: int) -> dict | str:
     """Check if content matches target reading level."""
     try:
-        word_count = len(content.split())
-        avg_word_length = sum(len(word) for word in content.split()) / max(word_count, 1)
+        words = content.split()
+        word_count = len(words)
+        # Joined words are exactly the non-whitespace characters; join+len is one C pass
+        avg_word_length = len("".join(words)) / word_count if word_count else 0
         
         analysis = {
             "word_count": word_count,
@@ -290,12 +372,13 @@ def check_reading_level(content: str, target_age: int) -> str:
         if word_count > 500 and target_age < 8:
             analysis["recommendations"].append("Content might be too long for age group")
             
-        return f"Reading level analysis: {json.dumps(analysis, indent=2)}"
+        return analysis
     except Exception as e:
         return f"Error checking reading level: {str(e)}"
 
 @tool
-def format_content_structure(content: str, content_type: str) -> str:
+@copied_lru_cache(maxsize=256)
+def format_content_structure(content: str, content_type: str) -> dict | str:
     """Format content into structured sections suitable for mobile display."""
     try:
         # Split content into manageable sections
@@ -332,41 +415,38 @@ def format_content_structure(content: str, content_type: str) -> str:
                     "scene_description": paragraph[:100] + "..."
                 })
         
-        return f"Content structure: {json.dumps(structure, indent=2)}"
+        return structure
     except Exception as e:
         return f"Error formatting structure: {str(e)}"
 
 @tool
-def generate_image_prompts(content: str, image_count: int, aesthetic_style: str) -> str:
+def generate_image_prompts(content: str, image_count: int, aesthetic_style: str) -> dict | str:
     """Generate specific image prompts based on content scenes."""
     try:
         # Extract key scenes from content
-        sentences = content.replace('\n', ' ').split('.')
-        key_sentences = [s.strip() for s in sentences if len(s.strip()) > 20][:image_count * 2]
+        sentences = (m.group().replace('\n', ' ').strip() for m in SENTENCE_RE.finditer(content))
+        key_sentences = list(islice((s for s in sentences if len(s) > 20), image_count))
         
-        prompts = []
-        for i in range(min(image_count, len(key_sentences))):
-            scene = key_sentences[i]
-            # Create descriptive prompt
-            prompt = f"{aesthetic_style}, {scene[:100]}, children's book illustration, colorful, engaging"
-            prompts.append(prompt)
+        # Create descriptive prompts (key_sentences never exceeds image_count)
+        prompts = [f"{aesthetic_style}, {scene[:100]}, children's book illustration, colorful, engaging" for scene in key_sentences]
         
         # Ensure we have the requested number of prompts
-        while len(prompts) < image_count:
-            prompts.append(f"{aesthetic_style}, magical scene, children's book illustration, colorful, whimsical")
+        if len(prompts) < image_count:
+            fallback_prompt = f"{aesthetic_style}, magical scene, children's book illustration, colorful, whimsical"
+            prompts.extend([fallback_prompt] * (image_count - len(prompts)))
         
         result = {
-            "image_prompts": prompts[:image_count],
-            "prompt_count": len(prompts[:image_count]),
+            "image_prompts": prompts,
+            "prompt_count": len(prompts),
             "aesthetic_style": aesthetic_style
         }
         
-        return f"Generated prompts: {json.dumps(result, indent=2)}"
+        return result
     except Exception as e:
         return f"Error generating image prompts: {str(e)}"
 
 @tool
-def generate_personalized_image_prompts(content: str, image_count: int, aesthetic_style: str, personalization_data: dict) -> str:
+def generate_personalized_image_prompts(content: str, image_count: int, aesthetic_style: str, personalization_data: dict) -> dict | str:
     """Generate highly detailed, personalized image prompts based on content and character details."""
     try:
         # Extract personalization details
@@ -375,36 +455,19 @@ def generate_personalized_image_prompts(content: str, image_count: int, aestheti
         child_gender = personalization_data.get("child_gender", "neutral")
         interests = personalization_data.get("interests", [])
         location = personalization_data.get("location", "")
+        location_words = frozenset(WORD_RE.findall(location.lower())) if location else frozenset()
         companions = personalization_data.get("companions", [])
         reading_level = personalization_data.get("reading_level", "medium")
         
         # Create detailed character description template
         def create_character_description(name: str, age: int, gender: str) -> str:
             """Create consistent character description for all images."""
-            gender_features = {
-                "she": "a girl with gentle features and curious eyes",
-                "he": "a boy with bright features and curious eyes", 
-                "they": "a child with kind features and curious eyes",
-                "neutral": "a child with bright, curious eyes"
-            }
-            
-            age_descriptors = {
-                range(2, 4): "toddler",
-                range(4, 6): "young child", 
-                range(6, 9): "child",
-                range(9, 13): "pre-teen"
-            }
+            age_desc = AGE_DESCRIPTORS[bisect_right(AGE_BOUNDS, age)] if isinstance(age, int) else "child"
             
-            age_desc = "child"
-            for age_range, desc in age_descriptors.items():
-                if age in age_range:
-                    age_desc = desc
-                    break
-            
-            base_desc = f"{name}, a {age_descriptors.get(range(age, age+1), age_desc)} {gender_features.get(gender, gender_features['neutral'])}"
+            base_desc = f"{name}, a {age_desc} {GENDER_FEATURES.get(gender) or GENDER_FEATURES['neutral']}"
             
             # Add physical characteristics based on personalization
-            if location and any(region in location.lower() for region in ['india', 'mumbai', 'delhi', 'bangalore']):
+            if not location_words.isdisjoint(INDIAN_REGIONS):
                 base_desc += ", with soft dark hair and warm brown eyes"
             else:
                 base_desc += ", with bright expressive features"
@@ -416,7 +479,7 @@ def generate_personalized_image_prompts(content: str, image_count: int, aestheti
             """Create environment description based on location and interests."""
             env_desc = ""
             if location:
-                if any(city in location.lower() for city in ['mumbai', 'delhi', 'bangalore', 'pune']):
+                if not location_words.isdisjoint(INDIAN_CITIES):
                     env_desc = f"in a vibrant {location} neighborhood with colorful houses and lush greenery"
                 else:
                     env_desc = f"in a charming {location} setting"
@@ -444,7 +507,8 @@ def generate_personalized_image_prompts(content: str, image_count: int, aestheti
                     scenes.append({"title": title, "content": scene_content})
         else:
             # Fallback: split by paragraphs
-            paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()][:image_count]
+            paragraphs = (m.group().strip() for m in PARAGRAPH_RE.finditer(content))
+            paragraphs = list(islice((p for p in paragraphs if p), image_count))
             for i, para in enumerate(paragraphs, 1):
                 scenes.append({"title": f"Scene {i}", "content": para[:200]})
 
@@ -453,6 +517,11 @@ def generate_personalized_image_prompts(content: str, image_count: int, aestheti
         character_desc = create_character_description(child_name, child_age, child_gender)
         env_context = create_environment_context(location, interests)
         
+        # Prompt pieces that are the same for every scene
+        character_focus = f". CHARACTER FOCUS: {character_desc}, age-appropriate proportions for a {child_age}-year-old, cheerful and engaging expression. COMPANIONS: "
+        environment = f". ENVIRONMENT: {env_context}, "
+        style_details = f" setting. LIGHTING & MOOD: Warm, inviting lighting creating a joyful and magical atmosphere, {aesthetic_style} style with vibrant, child-friendly color palette. COMPOSITION: Eye-level shot, centered subject with adequate margins, 16:9 aspect ratio, responsive layout. TECHNICAL: {aesthetic_style}, digital painting, masterpiece, ultra-detailed, high-quality rendering, intricate details, polished finish, character-focused composition, age-accurate proportions, sharp focus, personalized and authentic. NEGATIVE: --no age mismatch, gender confusion, character inaccuracy, generic appearance, wrong proportions, blurry details, poor composition"
+        
         for i in range(min(image_count, len(scenes))):
             scene = scenes[i]
             
@@ -464,15 +533,17 @@ def generate_personalized_image_prompts(content: str, image_count: int, aestheti
                 if comp.get('description'):
                     companion_desc += f" ({comp['description']})"
             
-            # Build comprehensive prompt with all details
-            detailed_prompt = f"{character_desc}{companion_desc} {scene['content'][:150]}. CHARACTER FOCUS: {character_desc}, age-appropriate proportions for a {child_age}-year-old, cheerful and engaging expression. COMPANIONS: {companion_desc if companion_desc else 'None'}. ENVIRONMENT: {env_context}, {scene['title'].lower()} setting. LIGHTING & MOOD: Warm, inviting lighting creating a joyful and magical atmosphere, {aesthetic_style} style with vibrant, child-friendly color palette. COMPOSITION: Eye-level shot, centered subject with adequate margins, 16:9 aspect ratio, responsive layout. TECHNICAL: {aesthetic_style}, digital painting, masterpiece, ultra-detailed, high-quality rendering, intricate details, polished finish, character-focused composition, age-accurate proportions, sharp focus, personalized and authentic. NEGATIVE: --no age mismatch, gender confusion, character inaccuracy, generic appearance, wrong proportions, blurry details, poor composition"
-            
-            prompts.append(detailed_prompt)
+            # Build comprehensive prompt with all details in a single join
+            prompts.append("".join((
+                character_desc, companion_desc, " ", scene['content'][:150],
+                character_focus, companion_desc or 'None',
+                environment, scene['title'].lower(), style_details,
+            )))
         
         # Fill remaining prompts if needed
-        while len(prompts) < image_count:
+        if len(prompts) < image_count:
             fallback_prompt = f"{character_desc} in a magical adventure. {env_context}. CHARACTER FOCUS: {character_desc}, joyful expression. ENVIRONMENT: Magical, whimsical setting perfect for {child_name}'s adventure. LIGHTING & MOOD: Bright, cheerful lighting, {aesthetic_style} style. COMPOSITION: Centered, engaging composition. TECHNICAL: {aesthetic_style}, high-quality, detailed, child-friendly."
-            prompts.append(fallback_prompt)
+            prompts.extend([fallback_prompt] * (image_count - len(prompts)))
         
         result = {
             "image_prompts": prompts[:image_count],
@@ -483,38 +554,79 @@ def generate_personalized_image_prompts(content: str, image_count: int, aestheti
             "environment_context": env_context
         }
         
-        return f"Generated personalized prompts: {json.dumps(result, indent=2)}"
+        return result
     except Exception as e:
         return f"Error generating personalized image prompts: {str(e)}"
 
-def get_llm() -> ChatGoogleGenerativeAI:
-    """Get or create the LLM instance with automatic .env loading for LangGraph compatibility."""
+def _create_chat_model(**kwargs) -> "ChatGoogleGenerativeAI":
+    """Create a Gemini chat model from the environment settings; .env is loaded once at module import."""
+    model_name = os.getenv('GEMINI_MODEL', 'gemini-1.5-pro')
+    api_key = os.getenv('GOOGLE_API_KEY')
+    
+    if not api_key:
+        raise ValueError(
+            "GOOGLE_API_KEY not found in environment variables.\n"
+            "Please ensure your .env file contains:\n"
+            "GOOGLE_API_KEY=your_actual_api_key_here"
+        )
+    
+    try:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        
+        llm = ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=0.7,
+            **kwargs
+        )
+        logger.info(f"✅ LLM initialized successfully for LangGraph: {model_name}")
+        return llm
+    except Exception as e:
+        raise ValueError(f"Failed to initialize LLM: {e}")
+
+def get_llm() -> "ChatGoogleGenerativeAI":
+    """Get or create the LLM instance."""
     global _llm
     if _llm is None:
-        # Ensure .env is loaded
-        load_dotenv()
-        
-        model_name = os.getenv('GEMINI_MODEL', 'gemini-1.5-pro')
-        api_key = os.getenv('GOOGLE_API_KEY')
-        
-        if not api_key:
-            raise ValueError(
-                "GOOGLE_API_KEY not found in environment variables.\n"
-                "Please ensure your .env file contains:\n"
-                "GOOGLE_API_KEY=your_actual_api_key_here"
-            )
-        
-        try:
-            _llm = ChatGoogleGenerativeAI(
-                model=model_name,
-                temperature=0.7
-            )
-            logger.info(f"✅ LLM initialized successfully for LangGraph: {model_name}")
-        except Exception as e:
-            raise ValueError(f"Failed to initialize LLM: {e}")
-    
+        _llm = _create_chat_model()
     return _llm
 
+# Compiled React agents keyed by (agent_name, tool names, resolved prompt); building one
+# re-resolves tool schemas and recompiles the graph, none of which changes between calls.
+# A small LRU keeps the hot agents alive. Nodes run in worker threads, so the OrderedDict
+# is only touched under the lock.
+AGENT_CACHE_SIZE = 16
+_agent_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+_agent_cache_lock = threading.Lock()
+
+def _get_cached_agent(cache_key: tuple) -> Any:
+    """Look up an agent and mark it most recently used, or return None."""
+    with _agent_cache_lock:
+        agent = _agent_cache.get(cache_key)
+        if agent is not None:
+            _agent_cache.move_to_end(cache_key)
+        return agent
+
+def _cache_agent(cache_key: tuple, agent: Any) -> None:
+    """Put an agent at the hot end of the LRU, evicting the coldest beyond AGENT_CACHE_SIZE."""
+    with _agent_cache_lock:
+        _agent_cache[cache_key] = agent
+        _agent_cache.move_to_end(cache_key)
+        if len(_agent_cache) > AGENT_CACHE_SIZE:
+            _agent_cache.popitem(last=False)
+
+def get_json_llm() -> Any:
+    """Get the LLM bound to Gemini's JSON mode, for calls whose reply is parsed as JSON.
+    
+    JSON mode makes the model emit a bare JSON document, so replies no longer need
+    markdown-fence extraction or the manual-parse fallbacks before the parser succeeds.
+    This is a separate model instance so it can carry its own response cache.
+    """
+    global _json_llm
+    if _json_llm is None:
+        cache = InMemoryCache(maxsize=LLM_CACHE_SIZE) if LLM_CACHE_SIZE > 0 else None
+        _json_llm = _create_chat_model(cache=cache).bind(response_mime_type="application/json")
+    return _json_llm
+
 def create_react_agent_for_task(agent_name: str, tools: Optional[List] = None, custom_prompt: Optional[str] = None, format_vars: Optional[Dict[str, Any]] = None) -> Any:
     """Create a React agent for a specific task with config-based prompt loading and optional variable substitution."""
     if tools is None:
@@ -530,20 +642,42 @@ def create_react_agent_for_task(agent_name: str, tools: Optional[List] = None, c
         logger.info(f"📋 PROMPT SOURCE: {agent_name} using CUSTOM PROMPT (directly provided)")
         logger.info(f"📏 CUSTOM PROMPT LENGTH: {len(custom_prompt)} characters")
     
+    # Format vars are already substituted into the prompt, so it covers them in the key
+    cache_key = (agent_name, tuple(getattr(t, "name", id(t)) for t in tools), custom_prompt)
+    agent = _get_cached_agent(cache_key)
+    if agent is not None:
+        logger.info(f"♻️ Reusing React agent for {agent_name} with {len(tools)} tools")
+        return agent
+    
     # Create the React agent with memory
     try:
+        from langgraph.prebuilt import create_react_agent
+        
         agent = create_react_agent(
             model=llm,
             tools=tools,
             prompt=custom_prompt,
             checkpointer=_checkpointer
         )
-        logger.info(f"✅ Created React agent for {agent_name} with {len(tools)} tools")
-        return agent
     except Exception as e:
         logger.error(f"Failed to create React agent for {agent_name}: {e}")
         # Fallback to direct LLM if agent creation fails
         return llm
+    
+    _cache_agent(cache_key, agent)
+    logger.info(f"✅ Created React agent for {agent_name} with {len(tools)} tools")
+    return agent
+
+def invoke_react_agent(agent: Any, content: str, config: Dict[str, Any]) -> Any:
+    """Run a React agent on a single user message, then drop its checkpoint thread.
+    
+    Every node run uses a fresh thread id and never resumes it, so keeping the
+    checkpoints would only grow the shared saver for the life of the process.
+    """
+    try:
+        return agent.invoke({"messages": [{"role": "user", "content": content}]}, config=config)
+    finally:
+        _checkpointer.delete_thread(config["configurable"]["thread_id"])
 
 # COMMENTED OUT: Priority-based prompt loading system (redundant, use config only)
 # def create_react_agent_for_task_with_priority(agent_name: str, tools: Optional[List] = None, custom_prompt: Optional[str] = None, inline_prompt: Optional[str] = None) -> Any:
@@ -621,6 +755,18 @@ def create_react_agent_for_task(agent_name: str, tools: Optional[List] = None, c
 #     logger.warning(f"📏 FALLBACK LENGTH: {len(fallback_prompt)} characters")
 #     return fallback_prompt
 
+# Top-level name of a format field ("plan" for "{plan.title}" or "{plan[0]}")
+FORMAT_FIELD_NAME_RE = re.compile(r"[^.\[]*")
+
+@lru_cache(maxsize=256)
+def prompt_format_fields(template: str) -> frozenset:
+    """Names a str.format template needs, parsed once per template string."""
+    return frozenset(
+        FORMAT_FIELD_NAME_RE.match(field_name).group()
+        for _, field_name, _, _ in string.Formatter().parse(template)
+        if field_name is not None
+    )
+
 def load_prompt_from_config(agent_name: str, prompt_type: str = "system_prompt", format_vars: Optional[Dict[str, Any]] = None) -> str:
     """
     Load prompt from prompts.yaml configuration with optional variable substitution.
@@ -635,8 +781,8 @@ def load_prompt_from_config(agent_name: str, prompt_type: str = "system_prompt",
         Prompt string from configuration with variables substituted
     """
     try:
-        from ..composer.config_loader import ConfigLoader
-        config_loader = ConfigLoader()
+        from ..composer.config_loader import get_config_loader
+        config_loader = get_config_loader()
         
         # Load the prompt from config
         prompt = config_loader.get_agent_prompt(agent_name, prompt_type)
@@ -645,26 +791,30 @@ def load_prompt_from_config(agent_name: str, prompt_type: str = "system_prompt",
             # Apply variable substitution if format_vars provided
             if format_vars:
                 try:
-                    prompt = prompt.format(**format_vars)
-                    logger.info(f"📝 Applied variable substitution to {agent_name}.{prompt_type}")
-                    logger.info(f"🔧 Variables: {list(format_vars.keys())}")
-                except KeyError as e:
-                    logger.warning(f"⚠️ Missing variable for formatting {agent_name}.{prompt_type}: {e}")
-                    # Continue with unformatted prompt rather than failing
+                    # Check the template's cached field names up front rather than
+                    # letting format() raise KeyError part-way through
+                    missing = prompt_format_fields(prompt) - format_vars.keys()
+                    if missing:
+                        logger.warning("⚠️ Missing variable for formatting %s.%s: %s", agent_name, prompt_type, sorted(missing))
+                        # Continue with unformatted prompt rather than failing
+                    else:
+                        prompt = prompt.format_map(format_vars)
+                        logger.info("📝 Applied variable substitution to %s.%s", agent_name, prompt_type)
+                        logger.info("🔧 Variables: %s", list(format_vars.keys()))
                 except Exception as e:
-                    logger.warning(f"⚠️ Error formatting {agent_name}.{prompt_type}: {e}")
+                    logger.warning("⚠️ Error formatting %s.%s: %s", agent_name, prompt_type, e)
                     # Continue with unformatted prompt rather than failing
             
             # Log prompt source for debugging
-            logger.info(f"📋 Loaded {agent_name}.{prompt_type} from prompts.yaml")
-            logger.info(f"📐 Prompt length: {len(prompt)} characters")
+            logger.info("📋 Loaded %s.%s from prompts.yaml", agent_name, prompt_type)
+            logger.info("📐 Prompt length: %d characters", len(prompt))
             return prompt
         else:
             # If prompt not found, raise error instead of fallback
             raise ValueError(f"Prompt {agent_name}.{prompt_type} not found in prompts.yaml")
             
     except Exception as e:
-        logger.error(f"Failed to load prompt for {agent_name}.{prompt_type}: {e}")
+        logger.error("Failed to load prompt for %s.%s: %s", agent_name, prompt_type, e)
         # Instead of complex fallback, fail fast
         raise ValueError(f"Required prompt {agent_name}.{prompt_type} missing from prompts.yaml") from e
 
@@ -672,10 +822,10 @@ def load_prompt_from_config(agent_name: str, prompt_type: str = "system_prompt",
 def log_llm_interaction(agent_name: str, system_prompt: str, user_prompt: str, 
                        llm_response: str, execution_time: float):
     """Log LLM interaction details."""
-    logger.info(f"🤖 {agent_name.upper()} LLM CALL")
-    logger.info(f"⏱️ Execution time: {execution_time:.2f}s")
-    logger.info(f"📝 User prompt length: {len(user_prompt)} chars")
-    logger.info(f"📄 Response length: {len(llm_response)} chars")
+    logger.info("🤖 %s LLM CALL", agent_name.upper())
+    logger.info("⏱️ Execution time: %.2fs", execution_time)
+    logger.info("📝 User prompt length: %d chars", len(user_prompt))
+    logger.info("📄 Response length: %d chars", len(llm_response))
 
 def log_prompt_usage_summary(state: Dict[str, Any]):
     """Log a comprehensive summary of which prompts were used during the run."""
@@ -688,10 +838,10 @@ def log_prompt_usage_summary(state: Dict[str, Any]):
     workflow_step = state.get("workflow_step", "unknown")
     current_agent = state.get("current_agent", "unknown")
     
-    logger.info(f"🎯 Use Case: {use_case}")
-    logger.info(f"🏁 Final Workflow Step: {workflow_step}")
-    logger.info(f"🤖 Last Active Agent: {current_agent}")
-    logger.info(f"🔄 Total State Keys: {len(state.keys())}")
+    logger.info("🎯 Use Case: %s", use_case)
+    logger.info("🏁 Final Workflow Step: %s", workflow_step)
+    logger.info("🤖 Last Active Agent: %s", current_agent)
+    logger.info("🔄 Total State Keys: %d", len(state.keys()))
     
     # Log the sequence of agents that ran (if trackable from state)
     agents_run = []
@@ -704,9 +854,15 @@ def log_prompt_usage_summary(state: Dict[str, Any]):
     if state.get("image_metadata") or state.get("story_image_prompts"):
         agents_run.append("image_generator")
     
-    logger.info(f"🔄 Agents Run Sequence: {' → '.join(agents_run)}")
+    logger.info("🔄 Agents Run Sequence: %s", ' → '.join(agents_run))
     logger.info("=" * 80)
 
+# Run output JSON is serialized straight to UTF-8 bytes (orjson never escapes non-ASCII)
+JSON_FILE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Threads used to flush a run's output files
+SAVE_OUTPUT_WORKERS = 4
+
 def simple_save_output(state: Dict[str, Any]) -> str:
     """Simple output saving function."""
     try:
@@ -714,123 +870,95 @@ def simple_save_output(state: Dict[str, Any]) -> str:
         from pathlib import Path
         
         # Create output directory
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        run_id = f"composer_run_{timestamp}"
+        run_id = f"composer_run_{unique_output_stamp()}"
         base_dir = Path(__file__).parent.parent.parent / "outputs" / "runs"
         run_dir = base_dir / run_id
         run_dir.mkdir(parents=True, exist_ok=True)
         
         saved_files = []  # Track what files we save
-        
-        # Save story content if available (standardized as content.txt)
-        if state.get("content"):
-            filepath = run_dir / "content.txt"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(state["content"])
-            saved_files.append("content.txt")
-        
-        # Save poetry content if available (standardized as content.txt)
-        if state.get("poetry_content"):
-            filepath = run_dir / "content.txt"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(state["poetry_content"])
-            saved_files.append("content.txt")
+        writes = []  # (path, payload) pairs, flushed together once everything is serialized
         
         # Save music content if available
         if state.get("music_content"):
-            filepath = run_dir / "music_content.txt"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(state["music_content"])
+            writes.append((run_dir / "music_content.txt", state["music_content"].encode()))
             saved_files.append("music_content.txt")
         
         # Save formatted story if available
         if state.get("formatted_story"):
             # Save JSON format for programmatic access
-            filepath = run_dir / "formatted_story.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state["formatted_story"], f, indent=2, ensure_ascii=False)
+            writes.append((run_dir / "formatted_story.json", orjson.dumps(state["formatted_story"], option=JSON_FILE_OPTIONS)))
             saved_files.append("formatted_story.json")
-            
-            # Save user-friendly text format (standardized as content.txt)
-            formatted_story = state["formatted_story"]
-            filepath = run_dir / "content.txt"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Title: {formatted_story.get('title', 'Untitled Story')}\n\n")
-                
-                if "chapters" in formatted_story:
-                    for i, chapter in enumerate(formatted_story["chapters"], 1):
-                        f.write(f"Chapter {i}: {chapter.get('title', f'Chapter {i}')}\n")
-                        f.write("=" * 50 + "\n")
-                        f.write(f"{chapter.get('content', '')}\n\n")
-                elif "content" in formatted_story:
-                    f.write(f"{formatted_story['content']}\n")
-            saved_files.append("content.txt")
         
         # Save formatted content (poetry/music) if available
         if state.get("formatted_content"):
             # Save JSON format for programmatic access
-            filepath = run_dir / "formatted_content.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state["formatted_content"], f, indent=2, ensure_ascii=False)
+            writes.append((run_dir / "formatted_content.json", orjson.dumps(state["formatted_content"], option=JSON_FILE_OPTIONS)))
             saved_files.append("formatted_content.json")
-            
-            # Save user-friendly text format (standardized as content.txt)
+        
+        # Save user-friendly text (standardized as content.txt) from the single most processed
+        # source: formatted content, then formatted story, then raw poetry, then raw story
+        parts = []
+        if state.get("formatted_content"):
             formatted_content = state["formatted_content"]
-            filepath = run_dir / "content.txt"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"Title: {formatted_content.get('title', 'Untitled Content')}\n\n")
-                
-                if "sections" in formatted_content:
-                    for i, section in enumerate(formatted_content["sections"], 1):
-                        f.write(f"Section {i}: {section.get('title', f'Section {i}')}\n")
-                        if section.get('type'):
-                            f.write(f"Type: {section['type']}\n")
-                        f.write("=" * 50 + "\n")
-                        f.write(f"{section.get('content', '')}\n\n")
-                elif "content" in formatted_content:
-                    f.write(f"{formatted_content['content']}\n")
+            parts.append(f"Title: {formatted_content.get('title', 'Untitled Content')}\n\n")
+            
+            if "sections" in formatted_content:
+                for i, section in enumerate(formatted_content["sections"], 1):
+                    parts.append(f"Section {i}: {section.get('title', f'Section {i}')}\n")
+                    if section.get('type'):
+                        parts.append(f"Type: {section['type']}\n")
+                    parts.append("=" * 50 + "\n")
+                    parts.append(f"{section.get('content', '')}\n\n")
+            elif "content" in formatted_content:
+                parts.append(f"{formatted_content['content']}\n")
+        elif state.get("formatted_story"):
+            formatted_story = state["formatted_story"]
+            parts.append(f"Title: {formatted_story.get('title', 'Untitled Story')}\n\n")
+            
+            if "chapters" in formatted_story:
+                for i, chapter in enumerate(formatted_story["chapters"], 1):
+                    parts.append(f"Chapter {i}: {chapter.get('title', f'Chapter {i}')}\n")
+                    parts.append("=" * 50 + "\n")
+                    parts.append(f"{chapter.get('content', '')}\n\n")
+            elif "content" in formatted_story:
+                parts.append(f"{formatted_story['content']}\n")
+        elif state.get("poetry_content"):
+            parts.append(state["poetry_content"])
+        elif state.get("content"):
+            parts.append(state["content"])
+        
+        if parts:
+            writes.append((run_dir / "content.txt", "".join(parts).encode()))
             saved_files.append("content.txt")
         
         # Save story image prompts if available
         if state.get("story_image_prompts"):
-            filepath = run_dir / "story_image_prompts.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state["story_image_prompts"], f, indent=2, ensure_ascii=False)
+            writes.append((run_dir / "story_image_prompts.json", orjson.dumps(state["story_image_prompts"], option=JSON_FILE_OPTIONS)))
             saved_files.append("story_image_prompts.json")
         
         # Save image descriptions if available
         if state.get("image_descriptions"):
-            filepath = run_dir / "image_descriptions.txt"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(state["image_descriptions"])
+            writes.append((run_dir / "image_descriptions.txt", state["image_descriptions"].encode()))
             saved_files.append("image_descriptions.txt")
         
         # Save image metadata if available
         if state.get("image_metadata"):
-            filepath = run_dir / "image_metadata.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state["image_metadata"], f, indent=2, ensure_ascii=False)
+            writes.append((run_dir / "image_metadata.json", orjson.dumps(state["image_metadata"], option=JSON_FILE_OPTIONS)))
             saved_files.append("image_metadata.json")
         
         # Save used image prompts if available
         if state.get("used_image_prompts"):
-            filepath = run_dir / "used_image_prompts.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state["used_image_prompts"], f, indent=2, ensure_ascii=False)
+            writes.append((run_dir / "used_image_prompts.json", orjson.dumps(state["used_image_prompts"], option=JSON_FILE_OPTIONS)))
             saved_files.append("used_image_prompts.json")
         
         # Save plan if available
         if state.get("plan"):
-            filepath = run_dir / "story_plan.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state["plan"], f, indent=2, ensure_ascii=False)
+            writes.append((run_dir / "story_plan.json", orjson.dumps(state["plan"], option=JSON_FILE_OPTIONS)))
             saved_files.append("story_plan.json")
         
         # Save critique if available
         if state.get("critique_feedback"):
-            filepath = run_dir / "story_critique.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state["critique_feedback"], f, indent=2, ensure_ascii=False)
+            writes.append((run_dir / "story_critique.json", orjson.dumps(state["critique_feedback"], option=JSON_FILE_OPTIONS)))
             saved_files.append("story_critique.json")
         
         # Save complete state for debugging
@@ -840,28 +968,53 @@ def simple_save_output(state: Dict[str, Any]) -> str:
             for key in ["agent_config"]:
                 state_copy.pop(key, None)
             
-            filepath = run_dir / "complete_state.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state_copy, f, indent=2, ensure_ascii=False, default=str)
+            writes.append((run_dir / "complete_state.json", orjson.dumps(state_copy, option=JSON_FILE_OPTIONS, default=str)))
             saved_files.append("complete_state.json")
         
+        # The files are independent and the writes are syscall-bound, so issue them concurrently
+        with ThreadPoolExecutor(max_workers=min(SAVE_OUTPUT_WORKERS, len(writes) or 1)) as executor:
+            # Drain the results so a failed write raises here
+            list(executor.map(lambda write: write[0].write_bytes(write[1]), writes))
+        
         # Log what was saved
-        logger.info(f"📁 Saved {len(saved_files)} files to: {run_dir}")
+        logger.info("📁 Saved %d files to: %s", len(saved_files), run_dir)
         for filename in saved_files:
-            logger.info(f"   💾 {filename}")
+            logger.info("   💾 %s", filename)
         
         # Debug: log available state keys for troubleshooting
         available_content_keys = [key for key in state.keys() if 'content' in key.lower()]
-        logger.info(f"🔍 Available content keys in state: {available_content_keys}")
+        logger.info("🔍 Available content keys in state: %s", available_content_keys)
         
         # Log comprehensive prompt usage summary
         log_prompt_usage_summary(state)
         
         return str(run_dir)
     except Exception as e:
-        logger.error(f"Error in simple_save_output: {e}")
+        logger.error("Error in simple_save_output: %s", e)
         return ""
 
+@dataclass(frozen=True, slots=True)
+class Personalization:
+    """Personalization fields read by the planner, writer and content generator, with their defaults."""
+    child_name: str = "Hero"
+    child_age: int = 8
+    child_gender: str = "neutral"
+    interests: List[str] = field(default_factory=list)
+    reading_level: str = "medium"
+    companions: List[Any] = field(default_factory=list)
+    location: str = ""
+    region: str = ""
+    mother_tongue: str = ""
+    language_of_story: str = "english"
+    moral_lesson: str = ""
+    theme: str = "adventure"
+
+PERSONALIZATION_FIELDS = frozenset(f.name for f in fields(Personalization))
+
+def personalization_from_state(state: Dict[str, Any]) -> Personalization:
+    """Personalization fields from state, defaulting those absent."""
+    return Personalization(**{key: state[key] for key in PERSONALIZATION_FIELDS & state.keys()})
+
 def planner_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Story planning agent with LangGraph React Agent integration.
@@ -869,8 +1022,9 @@ def planner_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     start_time = time.time()
     
-    print(f"🔍 [DEBUG] planner_node called - image_style in state: {state.get('image_style', 'NOT FOUND')}")
-    print(f"🔍 [DEBUG] planner_node - ALL STATE KEYS: {list(state.keys())}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔍 planner_node called - image_style in state: %s", state.get('image_style', 'NOT FOUND'))
+        logger.debug("🔍 planner_node - state keys: %s", list(state.keys()))
     
     try:
         # Extract input data including personalization
@@ -879,24 +1033,13 @@ def planner_node(state: Dict[str, Any]) -> Dict[str, Any]:
         educational_themes = state.get("style_preferences", {}).get("educational_themes", [])
         
         # Extract personalization parameters
-        child_name = state.get("child_name", "Hero")
-        child_age = state.get("child_age", 8)
-        child_gender = state.get("child_gender", "neutral")
-        interests = state.get("interests", [])
-        reading_level = state.get("reading_level", "medium")
-        companions = state.get("companions", [])
-        location = state.get("location", "")
-        region = state.get("region", "")
-        mother_tongue = state.get("mother_tongue", "")
-        language_of_story = state.get("language_of_story", "english")
-        moral_lesson = state.get("moral_lesson", "")
-        theme = state.get("theme", "adventure")
+        p = personalization_from_state(state)
         story_length = state.get("story_length", "medium")
         
         # Load story length constraints from use case config
         try:
-            from ..composer.config_loader import ConfigLoader
-            config_loader = ConfigLoader()
+            from ..composer.config_loader import get_config_loader
+            config_loader = get_config_loader()
             use_case_config = config_loader.get_use_case_config("story_generator")
             
             # Get story length constraints
@@ -909,10 +1052,10 @@ def planner_node(state: Dict[str, Any]) -> Dict[str, Any]:
             # Store in state for later use
             state["word_count"] = word_count 
             
-            logger.info(f"📝 Planner loaded story constraints: {story_length} - {word_count} words")
+            logger.info("📝 Planner loaded story constraints: %s - %s words", story_length, word_count)
             
         except Exception as e:
-            logger.warning(f"Could not load story length constraints in planner: {e}. Using defaults.")
+            logger.warning("Could not load story length constraints in planner: %s. Using defaults.", e)
             word_count = 400
         
         # Define tools for the planner agent
@@ -957,31 +1100,28 @@ Target Age Group: {age_group}
 Story Length: {story_length} ({word_count} words)
 
 Personalization Details:
-- Child's Name: {child_name}
-- Child's Age: {child_age}
-- Child's Gender: {child_gender}
-- Interests: {', '.join(interests) if interests else 'general activities'}
-- Reading Level: {reading_level}
-- Companions: {str(companions)}
-- Location: {location or 'neighborhood'}
-- Region: {region or 'local area'}
-- Mother Tongue: {mother_tongue or 'local language'}
-- Language of Story: {language_of_story}
-- Moral Lesson: {moral_lesson or 'friendship and kindness'}
-- Theme: {theme}
+- Child's Name: {p.child_name}
+- Child's Age: {p.child_age}
+- Child's Gender: {p.child_gender}
+- Interests: {', '.join(p.interests) if p.interests else 'general activities'}
+- Reading Level: {p.reading_level}
+- Companions: {str(p.companions)}
+- Location: {p.location or 'neighborhood'}
+- Region: {p.region or 'local area'}
+- Mother Tongue: {p.mother_tongue or 'local language'}
+- Language of Story: {p.language_of_story}
+- Moral Lesson: {p.moral_lesson or 'friendship and kindness'}
+- Theme: {p.theme}
 - Educational Themes: {', '.join(educational_themes) if educational_themes else 'General learning'}
 
 Please analyze the requirements using available tools and create a comprehensive story plan."""
 
         # Execute the React agent
-        config = {"configurable": {"thread_id": f"planner_{int(time.time())}"}}
+        config = {"configurable": {"thread_id": f"planner_{uuid.uuid4().hex}"}}
         
         try:
             # Try React agent execution
-            response = agent.invoke(
-                {"messages": [{"role": "user", "content": planning_input}]},
-                config=config
-            )
+            response = invoke_react_agent(agent, planning_input, config)
             
             # Extract response from React agent
             if isinstance(response, dict) and "messages" in response:
@@ -990,8 +1130,8 @@ Please analyze the requirements using available tools and create a comprehensive
                 response_text = str(response)
                 
         except Exception as agent_error:
-            logger.warning(f"React agent failed for planner, falling back to direct LLM: {agent_error}")
-            logger.info(f"🔄 PROMPT SOURCE: planner FALLING BACK to YAML PROMPTS (prompts.yaml)")
+            logger.warning("React agent failed for planner, falling back to direct LLM: %s", agent_error)
+            logger.info("🔄 PROMPT SOURCE: planner FALLING BACK to YAML PROMPTS (prompts.yaml)")
             
             # Fallback to direct LLM call
             llm = get_llm()
@@ -1002,18 +1142,18 @@ Please analyze the requirements using available tools and create a comprehensive
             user_prompt = user_prompt_template.format(
                 user_input=user_input,
                 age_group=age_group,
-                child_name=child_name,
-                child_age=child_age,
-                child_gender=child_gender,
-                interests=', '.join(interests) if interests else 'general activities',
-                reading_level=reading_level,
-                companions=str(companions),
-                location=location or 'neighborhood',
-                region=region or 'local area',
-                mother_tongue=mother_tongue or 'local language',
-                language_of_story=language_of_story,
-                moral_lesson=moral_lesson or 'friendship and kindness',
-                theme=theme,
+                child_name=p.child_name,
+                child_age=p.child_age,
+                child_gender=p.child_gender,
+                interests=', '.join(p.interests) if p.interests else 'general activities',
+                reading_level=p.reading_level,
+                companions=str(p.companions),
+                location=p.location or 'neighborhood',
+                region=p.region or 'local area',
+                mother_tongue=p.mother_tongue or 'local language',
+                language_of_story=p.language_of_story,
+                moral_lesson=p.moral_lesson or 'friendship and kindness',
+                theme=p.theme,
                 word_count=word_count,
                 educational_themes=', '.join(educational_themes) if educational_themes else 'General learning'
             )
@@ -1035,12 +1175,14 @@ Please analyze the requirements using available tools and create a comprehensive
         
         # Parse response
         try:
-            if response_text.strip().startswith('{'):
+            # json.loads skips leading whitespace itself, so just attempt the bare parse
+            try:
                 plan_data = json.loads(response_text)
-            else:
+            except json.JSONDecodeError:
+                plan_data = None
+            if not isinstance(plan_data, dict):
                 # Extract JSON from response if wrapped in markdown
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_text, re.DOTALL)
+                json_match = JSON_MD_BLOCK_RE.search(response_text) if '{' in response_text else None
                 if json_match:
                     plan_data = json.loads(json_match.group(1))
                 else:
@@ -1077,12 +1219,12 @@ Please analyze the requirements using available tools and create a comprehensive
         state["updated_at"] = datetime.now()
         state["workflow_step"] = "planning_complete"
         
-        logger.info(f"🎯 Planner React agent completed successfully in {execution_time:.2f}s")
+        logger.info("🎯 Planner React agent completed successfully in %.2fs", execution_time)
         
         return state
         
     except Exception as e:
-        logger.error(f"Error in planner_node: {e}")
+        logger.error("Error in planner_node: %s", e)
         state["errors"] = state.get("errors", []) + [f"Planning error: {str(e)}"]
         state["current_agent"] = "planner"
         state["workflow_step"] = "error"
@@ -1103,26 +1245,15 @@ def writer_node(state: Dict[str, Any]) -> Dict[str, Any]:
         story_length = state.get("story_length", "medium")
         
         # Extract personalization parameters
-        child_name = state.get("child_name", "Hero")
-        child_age = state.get("child_age", 8)
-        child_gender = state.get("child_gender", "neutral")
-        interests = state.get("interests", [])
-        reading_level = state.get("reading_level", "medium")
-        companions = state.get("companions", [])
-        location = state.get("location", "")
-        region = state.get("region", "")
-        mother_tongue = state.get("mother_tongue", "")
-        language_of_story = state.get("language_of_story", "english")
-        moral_lesson = state.get("moral_lesson", "")
-        theme = state.get("theme", "adventure")
+        p = personalization_from_state(state)
         
         if not plan:
             raise ValueError("No story plan available for writing")
         
         # Load story length constraints from use case config
         try:
-            from ..composer.config_loader import ConfigLoader
-            config_loader = ConfigLoader()
+            from ..composer.config_loader import get_config_loader
+            config_loader = get_config_loader()
             use_case_config = config_loader.get_use_case_config("story_generator")
             
             # Get story length constraints
@@ -1142,10 +1273,10 @@ def writer_node(state: Dict[str, Any]) -> Dict[str, Any]:
             state["words_per_page"] = words_per_page
             state["reading_time"] = reading_time
             
-            logger.info(f"📖 Story length constraints loaded: {story_length} - {word_count} words, {words_per_page} words/page")
+            logger.info("📖 Story length constraints loaded: %s - %s words, %s words/page", story_length, word_count, words_per_page)
             
         except Exception as e:
-            logger.warning(f"Could not load story length constraints: {e}. Using defaults.")
+            logger.warning("Could not load story length constraints: %s. Using defaults.", e)
             word_count = 400
             words_per_page = 135
             reading_time = 5
@@ -1188,7 +1319,7 @@ def writer_node(state: Dict[str, Any]) -> Dict[str, Any]:
         writing_input = f"""Transform the following story plan into a complete narrative:
 
 STORY PLAN:
-{json.dumps(plan, indent=2)}
+{to_prompt_json(plan)}
 
 WRITING REQUIREMENTS:
 - Target Age Group: {age_group}
@@ -1196,29 +1327,26 @@ WRITING REQUIREMENTS:
 - Reading Time: {reading_time} minutes
 
 PERSONALIZATION DETAILS:
-- Child's Name: {child_name}
-- Child's Age: {child_age}
-- Child's Gender: {child_gender}
-- Interests: {', '.join(interests) if interests else 'general activities'}
-- Reading Level: {reading_level}
-- Companions: {str(companions)}
-- Location: {location or 'neighborhood'}
-- Region: {region or 'local area'}
-- Language of Story: {language_of_story}
-- Moral Lesson: {moral_lesson or 'friendship and kindness'}
-- Theme: {theme}
+- Child's Name: {p.child_name}
+- Child's Age: {p.child_age}
+- Child's Gender: {p.child_gender}
+- Interests: {', '.join(p.interests) if p.interests else 'general activities'}
+- Reading Level: {p.reading_level}
+- Companions: {str(p.companions)}
+- Location: {p.location or 'neighborhood'}
+- Region: {p.region or 'local area'}
+- Language of Story: {p.language_of_story}
+- Moral Lesson: {p.moral_lesson or 'friendship and kindness'}
+- Theme: {p.theme}
 
 Please use your tools to analyze the plan, check reading level appropriateness, and create a complete, engaging story."""
 
         # Execute the React agent
-        config = {"configurable": {"thread_id": f"writer_{int(time.time())}"}}
+        config = {"configurable": {"thread_id": f"writer_{uuid.uuid4().hex}"}}
         
         try:
             # Try React agent execution
-            response = agent.invoke(
-                {"messages": [{"role": "user", "content": writing_input}]},
-                config=config
-            )
+            response = invoke_react_agent(agent, writing_input, config)
             
             # Extract response from React agent
             if isinstance(response, dict) and "messages" in response:
@@ -1227,7 +1355,7 @@ Please use your tools to analyze the plan, check reading level appropriateness,
                 story_content = str(response)
                 
         except Exception as agent_error:
-            logger.warning(f"React agent failed for writer, falling back to direct LLM: {agent_error}")
+            logger.warning("React agent failed for writer, falling back to direct LLM: %s", agent_error)
             
             # Fallback to direct LLM call
             llm = get_llm()
@@ -1239,7 +1367,7 @@ Please use your tools to analyze the plan, check reading level appropriateness,
             
             # Format the user prompt with personalization values
             user_prompt = user_prompt_template.format(
-                plan=json.dumps(plan, indent=2),
+                plan=to_prompt_json(plan),
                 user_input=user_input,
                 age_group=age_group,
                 story_length_constraints=story_length_constraints,
@@ -1247,18 +1375,18 @@ Please use your tools to analyze the plan, check reading level appropriateness,
                 words_per_page=words_per_page,
                 image_count=image_count,
                 # Personalization parameters
-                child_name=child_name,
-                child_age=child_age,
-                child_gender=child_gender,
-                interests=', '.join(interests) if interests else 'general activities',
-                reading_level=reading_level,
-                companions=str(companions),
-                location=location or 'neighborhood',
-                region=region or 'local area',
-                mother_tongue=mother_tongue or 'local language',
-                language_of_story=language_of_story,
-                moral_lesson=moral_lesson or 'friendship and kindness',
-                theme=theme
+                child_name=p.child_name,
+                child_age=p.child_age,
+                child_gender=p.child_gender,
+                interests=', '.join(p.interests) if p.interests else 'general activities',
+                reading_level=p.reading_level,
+                companions=str(p.companions),
+                location=p.location or 'neighborhood',
+                region=p.region or 'local area',
+                mother_tongue=p.mother_tongue or 'local language',
+                language_of_story=p.language_of_story,
+                moral_lesson=p.moral_lesson or 'friendship and kindness',
+                theme=p.theme
             )
 
             # Call LLM directly
@@ -1290,14 +1418,14 @@ Please use your tools to analyze the plan, check reading level appropriateness,
         return state
         
     except Exception as e:
-        logger.error(f"Error in writer_node: {e}")
+        logger.error("Error in writer_node: %s", e)
         state["errors"] = state.get("errors", []) + [f"Writing error: {str(e)}"]
         state["current_agent"] = "writer"
         state["workflow_step"] = "error"
         return state
 
 @tool
-def analyze_content_quality(content: str, age_group: str) -> str:
+def analyze_content_quality(content: str, age_group: str) -> dict | str:
     """Analyze content quality including readability, engagement, and age-appropriateness."""
     try:
         # Basic quality metrics
@@ -1330,7 +1458,7 @@ def analyze_content_quality(content: str, age_group: str) -> str:
             }
         }
         
-        return f"Content quality analysis: {json.dumps(analysis, indent=2)}"
+        return analysis
     except Exception as e:
         return f"Error analyzing content quality: {str(e)}"
 
@@ -1386,7 +1514,7 @@ def critique_node(state: Dict[str, Any]) -> Dict[str, Any]:
             context = f"""
 Content to critique: {content}
 
-Plan context: {json.dumps(plan, indent=2) if plan else 'N/A'}
+Plan context: {to_prompt_json(plan) if plan else 'N/A'}
 
 Target audience: {age_group}
 
@@ -1394,12 +1522,9 @@ Please analyze this content's quality, readability, and appropriateness for the
 """
             
             # Execute React agent with correct format
-            config = {"configurable": {"thread_id": f"critique_{int(time.time())}"}}
+            config = {"configurable": {"thread_id": f"critique_{uuid.uuid4().hex}"}}
             
-            response = agent.invoke(
-                {"messages": [{"role": "user", "content": context}]},
-                config=config
-            )
+            response = invoke_react_agent(agent, context, config)
             
             # Extract response from React agent
             if isinstance(response, dict) and "messages" in response:
@@ -1418,7 +1543,7 @@ Please analyze this content's quality, readability, and appropriateness for the
             # Format the user prompt with actual values
             user_prompt = user_prompt_template.format(
                 content=content,
-                plan=json.dumps(plan, indent=2),
+                plan=to_prompt_json(plan),
                 age_group=age_group
             )
     
@@ -1439,12 +1564,13 @@ Please analyze this content's quality, readability, and appropriateness for the
         
         # Parse critique response
         try:
-            if critique_text.strip().startswith('{'):
+            try:
                 critique_data = json.loads(critique_text)
-            else:
+            except json.JSONDecodeError:
+                critique_data = None
+            if not isinstance(critique_data, dict):
                 # Extract JSON if wrapped
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', critique_text, re.DOTALL)
+                json_match = JSON_MD_BLOCK_RE.search(critique_text) if '{' in critique_text else None
                 if json_match:
                     critique_data = json.loads(json_match.group(1))
                 else:
@@ -1497,7 +1623,7 @@ Please analyze this content's quality, readability, and appropriateness for the
         return state
 
 @tool
-def generate_rhyme_scheme(poem_type: str, target_age: int) -> str:
+def generate_rhyme_scheme(poem_type: str, target_age: int) -> dict | str:
     """Generate appropriate rhyme scheme based on poem type and target age."""
     try:
         age_schemes = {
@@ -1518,12 +1644,12 @@ def generate_rhyme_scheme(poem_type: str, target_age: int) -> str:
             "explanation": f"For {poem_type} targeting age {target_age}, {recommended} provides good rhythm and memorability"
         }
         
-        return f"Rhyme scheme recommendation: {json.dumps(result, indent=2)}"
+        return result
     except Exception as e:
         return f"Error generating rhyme scheme: {str(e)}"
 
 @tool
-def create_musical_rhythm(poem_content: str, style: str) -> str:
+def create_musical_rhythm(poem_content: str, style: str) -> dict | str:
     """Create musical rhythm suggestions for poem content."""
     try:
         # Analyze poem structure
@@ -1565,7 +1691,7 @@ def create_musical_rhythm(poem_content: str, style: str) -> str:
             }
         })
         
-        return f"Musical rhythm suggestions: {json.dumps(suggestion, indent=2)}"
+        return suggestion
     except Exception as e:
         return f"Error creating rhythm suggestions: {str(e)}"
 
@@ -1620,12 +1746,9 @@ Please create a beautiful, age-appropriate poem based on this request. Consider
 """
             
             # Execute React agent with correct format
-            config = {"configurable": {"thread_id": f"poetry_{int(time.time())}"}}
+            config = {"configurable": {"thread_id": f"poetry_{uuid.uuid4().hex}"}}
             
-            response = agent.invoke(
-                {"messages": [{"role": "user", "content": context}]},
-                config=config
-            )
+            response = invoke_react_agent(agent, context, config)
             
             # Extract response from React agent
             if isinstance(response, dict) and "messages" in response:
@@ -1688,7 +1811,7 @@ Please create a beautiful, age-appropriate poem based on this request. Consider
         return state
 
 @tool
-def compose_melody_structure(lyrics: str, style: str) -> str:
+def compose_melody_structure(lyrics: str, style: str) -> dict | str:
     """Compose melody structure suggestions based on lyrics and musical style."""
     try:
         # Analyze lyrics structure
@@ -1761,7 +1884,7 @@ def compose_melody_structure(lyrics: str, style: str) -> str:
             }
         }
         
-        return f"Melody structure: {json.dumps(result_structure, indent=2)}"
+        return result_structure
     except Exception as e:
         return f"Error composing melody structure: {str(e)}"
 
@@ -1818,12 +1941,9 @@ Please create song lyrics and musical arrangement suggestions based on this requ
 """
             
             # Execute React agent with correct format
-            config = {"configurable": {"thread_id": f"music_{int(time.time())}"}}
+            config = {"configurable": {"thread_id": f"music_{uuid.uuid4().hex}"}}
             
-            response = agent.invoke(
-                {"messages": [{"role": "user", "content": context}]},
-                config=config
-            )
+            response = invoke_react_agent(agent, context, config)
             
             # Extract response from React agent
             if isinstance(response, dict) and "messages" in response:
@@ -1900,7 +2020,7 @@ def image_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     start_time = time.time()
     
-    print(f"🔍 [DEBUG] image_generator_node called - image_style in state: {state.get('image_style', 'NOT FOUND')}")
+    logger.debug("🔍 image_generator_node called - image_style in state: %s", state.get('image_style', 'NOT FOUND'))
     
     try:
         # Debug: Print state keys before image generator starts
@@ -1995,8 +2115,8 @@ def image_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
         
         # Get use case configuration for image generation
         try:
-            from ..composer.config_loader import ConfigLoader
-            config_loader = ConfigLoader()
+            from ..composer.config_loader import get_config_loader
+            config_loader = get_config_loader()
             use_case_config = config_loader.get_use_case_config(use_case)
         except Exception as e:
             logger.warning(f"Could not load use case config: {e}")
@@ -2004,7 +2124,7 @@ def image_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
         
         # Create image generator with configuration
         from .image_generator import ConfigurableImageGenerator
-        generator = ConfigurableImageGenerator(use_case_config, unique_prefix=datetime.now().strftime("%Y%m%d_%H%M%S"))
+        generator = ConfigurableImageGenerator(use_case_config, unique_prefix=unique_output_stamp())
         
         # Override aesthetic if image_style is provided
         if "image_style" in state and state["image_style"]:
@@ -2020,15 +2140,21 @@ def image_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
         if story_image_prompts:
             # Use the formatter generated prompts
             logger.info(f"Using {len(story_image_prompts)} story-specific image prompts")
-            # tracemalloc.start()
-            for i, prompt in enumerate(story_image_prompts):
-                # Create a short, descriptive title for the filename
+            # Create a short, descriptive title for each filename
+            scene_titles = []
+            for i in range(len(story_image_prompts)):
                 scene_title = f"scene_{i + 1}"
                 if formatted_story and "chapters" in formatted_story and i < len(formatted_story["chapters"]):
                     chapter_title = formatted_story["chapters"][i].get("title", f"Chapter {i + 1}")
                     # Create short title from chapter title (max 20 chars)
                     scene_title = chapter_title.lower().replace(' ', '_')[:20]
-                image_path = generator.generate_single_image(prompt, i, scene_title)
+                scene_titles.append(scene_title)
+            
+            # Each image is an independent API call, so run them concurrently; map keeps prompt order
+            with ThreadPoolExecutor(max_workers=min(IMAGE_GENERATION_WORKERS, len(story_image_prompts))) as executor:
+                image_paths = list(executor.map(generator.generate_single_image, story_image_prompts, range(len(story_image_prompts)), scene_titles))
+            
+            for i, (prompt, image_path) in enumerate(zip(story_image_prompts, image_paths)):
                 if image_path:
                     generated_files.append(image_path)
                     # Use scene description for display, not filename
@@ -2037,14 +2163,6 @@ def image_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
                         scene_desc = formatted_story["chapters"][i].get("scene_description", scene_desc)
                     image_descriptions.append(f"Image {i + 1}: {scene_desc} - {prompt[:100]}...")
                     used_prompts.append(prompt)  # Store the actual prompt used
-                gc.collect()  # Force garbage collection after each image
-                # Print top 5 memory allocations after each image
-                # snapshot = tracemalloc.take_snapshot()
-            #     top_stats = snapshot.statistics('lineno')
-            #     print(f"\n[tracemalloc] Top 5 allocations after image {i+1}:")
-            #     for stat in top_stats[:5]:
-            #         print(stat)
-            # tracemalloc.stop()
                 
         # COMMENTED OUT: Fallback image generation - Use ONLY formatted prompts from content generator
         # elif content and plan:
@@ -2148,7 +2266,7 @@ def formatter_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     start_time = time.time()
     
-    print(f"🔍 [DEBUG] formatter_node called - image_style in state: {state.get('image_style', 'NOT FOUND')}")
+    logger.debug("🔍 formatter_node called - image_style in state: %s", state.get('image_style', 'NOT FOUND'))
     
     try:
         # Extract input data
@@ -2175,8 +2293,8 @@ def formatter_node(state: Dict[str, Any]) -> Dict[str, Any]:
         # Get use case configuration for image generation settings
         config_data = {}
         try:
-            from ..composer.config_loader import ConfigLoader
-            config_loader = ConfigLoader()
+            from ..composer.config_loader import get_config_loader
+            config_loader = get_config_loader()
             use_case_config = config_loader.get_use_case_config(use_case)
             image_settings = use_case_config.get("settings", {}).get("image_generation", {})
             image_count = image_settings.get("count", 3)
@@ -2187,12 +2305,12 @@ def formatter_node(state: Dict[str, Any]) -> Dict[str, Any]:
             
             # Check if image_style is provided in state and override aesthetic
             if "image_style" in state and state["image_style"]:
-                print(f"🎨 [DEBUG] formatter_node - Found image_style in state: '{state['image_style']}'")
+                logger.debug("🎨 formatter_node - Found image_style in state: '%s'", state['image_style'])
                 aesthetic = get_aesthetic_from_image_style(state["image_style"])
-                print(f"🎨 [DEBUG] formatter_node - Converted to aesthetic: '{aesthetic}'")
+                logger.debug("🎨 formatter_node - Converted to aesthetic: '%s'", aesthetic)
                 logger.info(f"🎨 Formatter using custom image style: {state['image_style']} -> {aesthetic}")
             else:
-                print("🎨 [DEBUG] formatter_node - No image_style in state, using default ghibli")
+                logger.debug("🎨 formatter_node - No image_style in state, using default ghibli")
                 aesthetic = get_aesthetic_from_image_style("ghibli")  # Use default ghibli style with full description
                 
             # Get aspect ratio and composition guide
@@ -2263,14 +2381,14 @@ def formatter_node(state: Dict[str, Any]) -> Dict[str, Any]:
                     "reading_level": state.get("reading_level", "medium")
                 }
                 personalization_context = f"""
-Personalization Data: {json.dumps(personalization_data, indent=2)}
+Personalization Data: {to_prompt_json(personalization_data)}
 Use generate_personalized_image_prompts with this personalization data to create highly detailed, character-specific image prompts.
 """
                 
             context = f"""
 Content Type: {content_type}
 Content: {main_content}
-Plan: {json.dumps(plan, indent=2) if plan else 'N/A'}
+Plan: {to_prompt_json(plan) if plan else 'N/A'}
 User Input: {user_input}
 Age Group: {age_group}
 Image Count: {config_data['image_count']}
@@ -2285,12 +2403,9 @@ Please format this content into a structured format suitable for mobile display
 """
             
             # Execute React agent with correct format
-            config = {"configurable": {"thread_id": f"formatter_{int(time.time())}"}}
+            config = {"configurable": {"thread_id": f"formatter_{uuid.uuid4().hex}"}}
             
-            response = agent.invoke(
-                {"messages": [{"role": "user", "content": context}]},
-                config=config
-            )
+            response = invoke_react_agent(agent, context, config)
             
             # Extract response from React agent
             if isinstance(response, dict) and "messages" in response:
@@ -2301,8 +2416,8 @@ Please format this content into a structured format suitable for mobile display
         except Exception as agent_error:
             logger.warning(f"React agent failed: {agent_error}, falling back to direct LLM")
             
-            # Fallback to direct LLM call
-            llm = get_llm()
+            # Fallback to direct LLM call, in JSON mode since the reply is parsed as JSON
+            llm = get_json_llm()
             system_prompt = load_prompt_from_config("formatter", "system_prompt", config_data)
             user_prompt_template = load_prompt_from_config("formatter", "user_prompt", config_data)
             
@@ -2314,7 +2429,7 @@ Please format this content into a structured format suitable for mobile display
             user_prompt = user_prompt_template.format(
                 content_type=content_type,
                 content=main_content,
-                plan=json.dumps(plan, indent=2) if plan else "N/A",
+                plan=to_prompt_json(plan) if plan else "N/A",
                 user_input=user_input,
                 age_group=age_group,
                 image_count=config_data["image_count"],
@@ -2349,13 +2464,15 @@ Please format this content into a structured format suitable for mobile display
         
         try:
             # First try to parse as JSON directly
-            if formatted_response.strip().startswith('{'):
+            try:
                 formatted_data = json.loads(formatted_response)
+            except json.JSONDecodeError:
+                formatted_data = None
+            if isinstance(formatted_data, dict):
                 logger.info(f"✅ Direct JSON parsing successful")
             else:
                 # Extract JSON from response if wrapped in markdown
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', formatted_response, re.DOTALL)
+                json_match = JSON_MD_BLOCK_RE.search(formatted_response) if '{' in formatted_response else None
                 if json_match:
                     formatted_data = json.loads(json_match.group(1))
                     logger.info(f"✅ Markdown JSON extraction successful")
@@ -2492,7 +2609,7 @@ Please format this content into a structured format suitable for mobile display
             # print("-" * 40)
             if "chapters" in formatted_story and formatted_story["chapters"]:
                 for i, chapter in enumerate(formatted_story["chapters"], 1):
-                    print(f"\nChapter {i}: {chapter.get('title', f'Chapter {i}')}")
+                    logger.debug("Chapter %d: %s", i, chapter.get('title', f"Chapter {i}"))
                     # print(f"Content: {chapter.get('content', '')[:200]}...")
             else:
                 content_preview = formatted_story.get('content', '')[:500]
@@ -2507,7 +2624,7 @@ Please format this content into a structured format suitable for mobile display
             # print("-" * 40)
             if "sections" in formatted_content and formatted_content["sections"]:
                 for i, section in enumerate(formatted_content["sections"], 1):
-                    print(f"\nSection {i}: {section.get('title', f'Section {i}')}")
+                    logger.debug("Section %d: %s", i, section.get('title', f"Section {i}"))
                     # print(f"Type: {section.get('type', 'content')}")
                     # print(f"Content: {section.get('content', '')[:200]}...")
             # print("="*80)
@@ -2540,11 +2657,11 @@ def determine_content_type(state: Dict[str, Any]) -> str:
         
         # Load use case config to get content type
         try:
-            from ..composer.config_loader import ConfigLoader
+            from ..composer.config_loader import get_config_loader
         except ImportError:
             # Fallback for standalone testing
             try:
-                from composer.config_loader import ConfigLoader
+                from composer.config_loader import get_config_loader
             except ImportError:
                 # Direct mapping as fallback
                 use_case_to_content_type = {
@@ -2556,7 +2673,7 @@ def determine_content_type(state: Dict[str, Any]) -> str:
                 logger.info(f"🎯 Using direct mapping: '{use_case}' -> '{content_type}'")
                 return content_type
                 
-        config_loader = ConfigLoader()
+        config_loader = get_config_loader()
         use_case_config = config_loader.get_use_case_config(use_case)
         
         # Get content type from config
@@ -2587,11 +2704,11 @@ def get_content_type_prompts(content_type: str, prompt_key: str = "content_gener
     try:
         # Try different import paths for robustness
         try:
-            from ..composer.config_loader import ConfigLoader
+            from ..composer.config_loader import get_config_loader
         except ImportError:
-            from composer.config_loader import ConfigLoader
+            from composer.config_loader import get_config_loader
             
-        config_loader = ConfigLoader()
+        config_loader = get_config_loader()
         
         # Get the universal content_generator prompts
         system_prompt = config_loader.get_agent_prompt(prompt_key, "system_prompt")
@@ -2681,9 +2798,10 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     start_time = time.time()
     
-    print(f"🔍 [DEBUG] content_generator_node called - image_style in state: {state.get('image_style', 'NOT FOUND')}")
-    print(f"🔍 [DEBUG] content_generator_node - ALL STATE KEYS: {list(state.keys())}")
-    print(f"🔍 [DEBUG] content_generator_node - STATE TYPE: {type(state)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔍 content_generator_node called - image_style in state: %s", state.get('image_style', 'NOT FOUND'))
+        logger.debug("🔍 content_generator_node - state keys: %s", list(state.keys()))
+        logger.debug("🔍 content_generator_node - state type: %s", type(state))
     
     try:
         # Determine content type from use case
@@ -2699,26 +2817,15 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
         story_length = state.get("story_length", "medium")
         
         # Extract personalization parameters
-        child_name = state.get("child_name", "Hero")
-        child_age = state.get("child_age", 8)
-        child_gender = state.get("child_gender", "neutral")
-        interests = state.get("interests", [])
-        reading_level = state.get("reading_level", "medium")
-        companions = state.get("companions", [])
-        location = state.get("location", "")
-        region = state.get("region", "")
-        mother_tongue = state.get("mother_tongue", "")
-        language_of_story = state.get("language_of_story", "english")
-        moral_lesson = state.get("moral_lesson", "")
-        theme = state.get("theme", "adventure")
+        p = personalization_from_state(state)
         
         if not plan:
             raise ValueError(f"No plan available for {content_type} content generation")
         
         # Load content type-specific constraints from use case config
         try:
-            from ..composer.config_loader import ConfigLoader
-            config_loader = ConfigLoader()
+            from ..composer.config_loader import get_config_loader
+            config_loader = get_config_loader()
             use_case_config = config_loader.get_use_case_config(use_case)
             
             # Get story/content length constraints and image settings
@@ -2734,15 +2841,15 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
             
             # Check if image_style is provided in state and get detailed style information
             if "image_style" in state and state["image_style"]:
-                print(f"🎨 [DEBUG] content_generator_node - Found image_style in state: '{state['image_style']}'")
+                logger.debug("🎨 content_generator_node - Found image_style in state: '%s'", state['image_style'])
                 # Get detailed style information for intelligent prompt formatting
                 style_details = get_aesthetic_from_image_style(state["image_style"], return_details=True)
                 aesthetic = get_aesthetic_from_image_style(state["image_style"])  # Keep for backward compatibility
-                print(f"🎨 [DEBUG] content_generator_node - Converted to aesthetic: '{aesthetic}'")
-                print(f"🎨 [DEBUG] content_generator_node - Style details: {style_details}")
+                logger.debug("🎨 content_generator_node - Converted to aesthetic: '%s'", aesthetic)
+                logger.debug("🎨 content_generator_node - Style details: %s", style_details)
                 logger.info(f"🎨 Content generator using custom image style: {state['image_style']} -> {aesthetic}")
             else:
-                print("🎨 [DEBUG] content_generator_node - No image_style in state, using default ghibli")
+                logger.debug("🎨 content_generator_node - No image_style in state, using default ghibli")
                 style_details = get_aesthetic_from_image_style("ghibli", return_details=True)  # Get detailed ghibli style info
                 aesthetic = get_aesthetic_from_image_style("ghibli")  # Use default ghibli style with full description
                 
@@ -2772,8 +2879,8 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
         # Get content type-specific prompts
         system_prompt, user_prompt_template = get_content_type_prompts(content_type)
         
-        # Get LLM
-        llm = get_llm()
+        # Get LLM in JSON mode - the reply is parsed as FormatterOutput JSON
+        llm = get_json_llm()
         
         # Set up JSON output parser for structured formatting
         parser = JsonOutputParser(pydantic_object=FormatterOutput)
@@ -2786,7 +2893,7 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
         user_prompt = user_prompt_template.format(
             content_type=content_type,  # Key addition for content type awareness
             use_case=use_case,
-            plan=json.dumps(plan, indent=2),
+            plan=to_prompt_json(plan),
             user_input=user_input,
             age_group=age_group,
             story_length_constraints=content_length_constraints,
@@ -2798,20 +2905,20 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
             aspect_ratio=aspect_ratio,
             composition_guide=composition_guide,
             # Detailed style information for intelligent prompt generation (as raw JSON)
-            style_map=json.dumps(style_details, indent=2),
+            style_map=to_prompt_json(style_details),
             # Personalization parameters
-            child_name=child_name,
-            child_age=child_age,
-            child_gender=child_gender,
-            interests=', '.join(interests) if interests else 'general activities',
-            reading_level=reading_level,
-            companions=str(companions),
-            location=location or 'neighborhood',
-            region=region or 'local area',
-            mother_tongue=mother_tongue or 'local language',
-            language_of_story=language_of_story,
-            moral_lesson=moral_lesson or 'friendship and kindness',
-            theme=theme
+            child_name=p.child_name,
+            child_age=p.child_age,
+            child_gender=p.child_gender,
+            interests=', '.join(p.interests) if p.interests else 'general activities',
+            reading_level=p.reading_level,
+            companions=str(p.companions),
+            location=p.location or 'neighborhood',
+            region=p.region or 'local area',
+            mother_tongue=p.mother_tongue or 'local language',
+            language_of_story=p.language_of_story,
+            moral_lesson=p.moral_lesson or 'friendship and kindness',
+            theme=p.theme
         )
 
         # print("###############################################")
@@ -2825,7 +2932,7 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 content_type=content_type,
                 use_case=use_case,
                 age_group=age_group,
-                language_of_story=language_of_story
+                language_of_story=p.language_of_story
             )),
             HumanMessage(content=user_prompt)
         ]
@@ -2849,17 +2956,16 @@ def content_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
             logger.warning(f"🔍 Response preview: {response_text[:200]}...")
             
             # Fallback to manual parsing if needed
-            if response_text.strip().startswith('{'):
-                try:
-                    formatted_data = json.loads(response_text)
-                    logger.info(f"✅ Manual JSON parsing successful for {content_type}")
-                except json.JSONDecodeError as json_error:
-                    logger.warning(f"🚫 Manual JSON parsing also failed for {content_type}: {json_error}")
-                    formatted_data = None
+            try:
+                formatted_data = json.loads(response_text)
+            except json.JSONDecodeError as json_error:
+                logger.warning(f"🚫 Manual JSON parsing also failed for {content_type}: {json_error}")
+                formatted_data = None
+            if isinstance(formatted_data, dict):
+                logger.info(f"✅ Manual JSON parsing successful for {content_type}")
             else:
                 # Extract JSON from response if wrapped in markdown
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_text, re.DOTALL)
+                json_match = JSON_MD_BLOCK_RE.search(response_text) if '{' in response_text else None
                 if json_match:
                     try:
                         formatted_data = json.loads(json_match.group(1))
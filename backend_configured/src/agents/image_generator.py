@@ -7,6 +7,7 @@ with configurable settings from use cases.
 
 import os
 import time
+import uuid
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
@@ -43,7 +44,7 @@ class ConfigurableImageGenerator:
             unique_prefix: Unique prefix for generated files
         """
         self.use_case_config = use_case_config
-        self.unique_prefix = unique_prefix or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.unique_prefix = unique_prefix or f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
         
         # Extract image generation settings
         self.settings = use_case_config.get("settings", {}).get("image_generation", {})
@@ -9,11 +9,12 @@ and configuring their routing.
 
 from .graph import DynamicGraph
 from .state import ComposerState, create_initial_state
-from .config_loader import ConfigLoader
+from .config_loader import ConfigLoader, get_config_loader
 
 __all__ = [
     "DynamicGraph",
     "ComposerState", 
     "create_initial_state",
-    "ConfigLoader"
+    "ConfigLoader",
+    "get_config_loader"
 ]
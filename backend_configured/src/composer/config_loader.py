@@ -7,12 +7,22 @@ including use_cases.yaml and prompts.yaml.
 
 import yaml
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import logging
 
+# libyaml's C loader parses much faster; fall back to the pure-Python one if it isn't built
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
 logger = logging.getLogger(__name__)
 
+# Default configs directory, relative to this file
+DEFAULT_CONFIG_DIR = Path(__file__).parent.parent.parent / "configs"
+
 
 class ConfigLoader:
     """
@@ -33,7 +43,7 @@ class ConfigLoader:
         """
         if config_dir is None:
             # Default to configs directory relative to this file
-            self.config_dir = Path(__file__).parent.parent.parent / "configs"
+            self.config_dir = DEFAULT_CONFIG_DIR
         else:
             self.config_dir = config_dir
             
@@ -51,7 +61,7 @@ class ConfigLoader:
         
         try:
             with open(use_cases_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=YamlSafeLoader)
             
             logger.info(f"📁 Loaded use cases configuration from {use_cases_path}")
             return config
@@ -70,7 +80,7 @@ class ConfigLoader:
         
         try:
             with open(prompts_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=YamlSafeLoader)
             
             logger.info(f"📁 Loaded prompts configuration from {prompts_path}")
             return config
@@ -246,3 +256,24 @@ class ConfigLoader:
         except Exception as e:
             logger.error(f"Validation failed for use case '{use_case_name}': {e}")
             return False
+
+
+@lru_cache(maxsize=None)
+def _shared_config_loader(config_dir: Path) -> ConfigLoader:
+    return ConfigLoader(config_dir)
+
+
+def get_config_loader(config_dir: Optional[Path] = None) -> ConfigLoader:
+    """
+    Get the shared ConfigLoader for a configs directory.
+    
+    The YAML files are parsed once per process; later calls return the same
+    instance instead of re-reading use_cases.yaml and prompts.yaml.
+    
+    Args:
+        config_dir: Path to the configs directory. If None, uses default location.
+        
+    Returns:
+        Shared ConfigLoader instance
+    """
+    return _shared_config_loader(Path(config_dir) if config_dir is not None else DEFAULT_CONFIG_DIR)
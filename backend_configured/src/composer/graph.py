@@ -14,7 +14,7 @@ from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableConfig
 
 from .state import ComposerState, should_continue_workflow
-from .config_loader import ConfigLoader
+from .config_loader import get_config_loader
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +39,7 @@ class DynamicGraph:
             config_dir: Path to the configs directory
         """
         self.use_case_name = use_case_name
-        self.config_loader = ConfigLoader(config_dir)
+        self.config_loader = get_config_loader(config_dir)
         
         # Load and validate configuration
         self.use_case_config = self.config_loader.get_use_case_config(use_case_name)
@@ -10,7 +10,7 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 
 from .composer.graph import DynamicGraph
-from .composer.config_loader import ConfigLoader
+from .composer.config_loader import get_config_loader
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +32,7 @@ class ComposerAPI:
         Args:
             config_dir: Path to the configs directory
         """
-        self.config_loader = ConfigLoader(config_dir)
+        self.config_loader = get_config_loader(config_dir)
         logger.info("✅ ComposerAPI initialized")
     
     def list_use_cases(self) -> Dict[str, Any]:
@@ -4,7 +4,6 @@ from typing import Callable, Optional, cast, Any, Dict, List
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
 from datetime import datetime
-import json
 
 
 @tool